@@ -1,30 +1,32 @@
 from decimal import Decimal
 import os
-from pydoc import doc
 import secrets
-from flask import Flask, app, flash, redirect, render_template, request, jsonify, url_for, Blueprint, send_file, abort
+from flask import Flask, app, flash, redirect, render_template, request, jsonify, url_for, Blueprint, send_file, abort, Response, stream_with_context
 import traceback as tb
 from datetime import date, datetime
 import calendar
+import click
+import csv
+import gzip
+import hashlib
 import tempfile
 import webbrowser
-
 from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.enums import TA_LEFT
-from reportlab.lib import pagesizes
-from reportlab.lib.units import inch
+
 from datetime import timedelta
 
 from sqlalchemy import case, func, text
+from sqlalchemy.orm import joinedload
+from werkzeug.datastructures import MultiDict
 
+import cache
 import db_utils as dbu
-from db import db, init_db
+from db import db, init_db, backup_status, get_backup_store
 import models as md
 
 import general_utils as gu
+import jobs
+import startup_timing
 
 def create_app(config=None):
     app = Flask(__name__)
@@ -33,8 +35,15 @@ def create_app(config=None):
         app.config.update(config)
     app.config["SECRET_KEY"] = get_or_create_secret_key()
 
-    init_db(app)
+    if app.config.get("SEND_FILE_MAX_AGE_DEFAULT") is None:
+        app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
+
+    with startup_timing.phase("init_db"):
+        init_db(app)
+    app.extensions["jobs"] = jobs.JobQueue(max_workers=app.config.get("JOB_WORKERS", 2))
     register_routes(app)
+    register_commands(app)
+    register_response_hooks(app)
 
     @app.errorhandler(Exception)
     def handle_error(e):
@@ -61,6 +70,65 @@ def create_app(config=None):
     
     return app
 
+# Static files are cached by the browser for a year. Their URLs carry the
+# file's modification time (?v=...), so a changed file gets a new URL.
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 500
+GZIP_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+def register_response_hooks(app):
+    static_versions = {}
+
+    @app.url_defaults
+    def add_static_version(endpoint, values):
+        if endpoint != "static" or "filename" not in values:
+            return
+        filename = values["filename"]
+        if filename not in static_versions:
+            try:
+                static_versions[filename] = int(os.path.getmtime(os.path.join(app.static_folder, filename)))
+            except OSError:
+                static_versions[filename] = None
+        if static_versions[filename]:
+            values["v"] = static_versions[filename]
+
+    @app.after_request
+    def gzip_response(response):
+        if (
+            response.status_code != 200
+            or (response.is_streamed and not response.direct_passthrough)  # e.g. the exports
+            or response.mimetype not in GZIP_MIMETYPES
+            or "Content-Encoding" in response.headers
+            or "gzip" not in request.accept_encodings
+        ):
+            return response
+
+        response.direct_passthrough = False  # static files are sent as a file wrapper
+        data = response.get_data()
+        if len(data) < GZIP_MIN_SIZE:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        # the compressed body is a different representation of the same content
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
+
 def get_or_create_secret_key():
     key_file = "static/files/secret_key.txt"
 
@@ -73,226 +141,724 @@ def get_or_create_secret_key():
             f.write(key)
         return key
     
+def get_case_work_page_args(args):
+    """
+    Reads the sort, cursor and filter parameters of the case work table
+    from the request query string, or from a bulk request's filters
+    object. Raises ValueError on a malformed value: a filter that can't be
+    read must not widen the selection.
+    """
+    def parse_text(name):
+        value = args.get(name)
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            raise ValueError(f"Hibás szűrési feltétel: {name}.")
+        return value.strip() or None
+
+    def parse_date(name):
+        value = parse_text(name)
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+    def parse_id(name):
+        value = args.get(name)
+        if value in (None, ""):
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"Hibás szűrési feltétel: {name}.")
+        return int(value)
+
+    def parse_billed():
+        # "1"/"0" from the query string, true/false from JSON
+        value = args.get("billed")
+        if value in (None, ""):
+            return None
+        if value is True or value == "1":
+            return True
+        if value is False or value == "0":
+            return False
+        raise ValueError("Hibás szűrési feltétel: billed.")
+
+    limit = args.get("limit", type=int) or dbu.CASE_WORK_PAGE_SIZE
+
+    return {
+        "sort": args.get("sort", "date"),
+        "direction": "asc" if args.get("dir") == "asc" else "desc",
+        "cursor": args.get("cursor") or None,
+        "limit": min(max(limit, 1), 500),
+        "q": parse_text("q"),
+        "user_id": parse_id("user_id"),
+        "case_id": parse_id("case_id"),
+        "case_number": parse_text("case_number"),
+        "billed": parse_billed(),
+        "date_from": parse_date("date_from"),
+        "date_to": parse_date("date_to"),
+    }
+
+# Filters of the case work table a bulk edit/delete can select rows by
+CASE_WORK_FILTERS = ("q", "user_id", "case_id", "case_number", "billed", "date_from", "date_to")
+
+def get_bulk_ids(data):
+    """
+    The ids of a bulk request's JSON body, an empty list without them.
+    """
+    try:
+        return [int(row_id) for row_id in data.get("ids") or []]
+    except (TypeError, ValueError):
+        raise ValueError("Hibás azonosító.")
+
+def get_case_work_selection(data):
+    """
+    The case work entries a bulk request acts on: its ids, or its filters,
+    the case work table's query parameters as an object.
+    """
+    if data.get("filters") is None:
+        return {"ids": get_bulk_ids(data)}
+    if not isinstance(data["filters"], dict):
+        raise ValueError("Hibás szűrési feltétel.")
+    try:
+        page_args = get_case_work_page_args(MultiDict(data["filters"]))
+    except ValueError:
+        raise ValueError("Hibás szűrési feltétel.")
+    return {"filters": {key: page_args[key] for key in CASE_WORK_FILTERS if page_args[key] is not None}}
+
+def get_bulk_values(data, fields):
+    """
+    The values of a bulk edit, JSON booleans for is_*/billed, ids (or
+    None) for the *_id fields. Raises ValueError on anything else.
+    """
+    values = {}
+    for key in fields:
+        if key not in (data.get("values") or {}):
+            continue
+        value = data["values"][key]
+        if key.endswith("_id"):
+            try:
+                values[key] = int(value) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                raise ValueError("Hibás azonosító.")
+        elif isinstance(value, bool):
+            values[key] = value
+        else:
+            raise ValueError(f"Hibás érték: {key}.")
+    return values
+
+# Rows per typeahead request (/get-cases, /get-clients, /get-users)
+LOOKUP_DEFAULT_LIMIT = 20
+LOOKUP_MAX_LIMIT = 50
+
+def get_lookup_args(args):
+    """
+    Reads q, limit and offset of a typeahead lookup from the request query
+    string.
+    """
+    limit = args.get("limit", type=int) or LOOKUP_DEFAULT_LIMIT
+    offset = args.get("offset", type=int) or 0
+    return {
+        "q": args.get("q", "").strip(),
+        "limit": min(max(limit, 1), LOOKUP_MAX_LIMIT),
+        "offset": max(offset, 0),
+    }
+
+def register_commands(app):
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups_command():
+        """Rebuild the report rollup tables from case_work and verify them."""
+        import rollups
+
+        mismatches = rollups.verify_rollups()
+        print(f"Rollup rows out of sync before rebuild: {len(mismatches)}")
+        rollups.rebuild_rollups()
+
+        mismatches = rollups.verify_rollups()
+        if mismatches:
+            print(f"Rollups still inconsistent after rebuild: {mismatches}")
+            raise SystemExit(1)
+        print("Rollups rebuilt and verified.")
+
+    @app.cli.command("import-reference-data")
+    @click.argument("kind", type=click.Choice(["case-types", "users", "clients"]))
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    def import_reference_data_command(kind, path):
+        """Bulk import case types, users or clients from a JSON or CSV file."""
+        import reference_data
+
+        inserted = reference_data.IMPORTERS[kind](path)
+        print(f"{inserted} new {kind} imported.")
+
+    @app.cli.command("import-case-works")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--errors", "errors_path", type=click.Path(dir_okay=False),
+                  help="Write the rejected rows with their errors to this CSV file.")
+    def import_case_works_command(path, errors_path):
+        """Bulk import work entries from a CSV or XLSX file."""
+        import work_import
+
+        started = datetime.now()
+        try:
+            with open(path, "rb") as f:
+                result = work_import.import_case_works(work_import.iter_rows(f, path))
+        except ValueError as e:
+            print(e)
+            raise SystemExit(1)
+        seconds = (datetime.now() - started).total_seconds()
+
+        print(f"{result['imported']} work entries imported in {seconds:.1f}s, "
+              f"{len(result['errors'])} rows rejected.")
+        if errors_path:
+            with open(errors_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["row", "error"])
+                writer.writerows(result["errors"])
+        else:
+            for row_number, message in result["errors"][:50]:
+                print(f"  row {row_number}: {message}")
+
+    @app.cli.command("export")
+    @click.argument("kind", type=click.Choice(["case-works", "cases", "clients"]))
+    @click.argument("output", type=click.Path(dir_okay=False))
+    @click.option("--date-from", help="YYYY-MM-DD, case works only")
+    @click.option("--date-to", help="YYYY-MM-DD, case works only")
+    @click.option("--billed", type=click.Choice(["0", "1"]), help="case works only")
+    @click.option("--active-only", is_flag=True, help="cases only")
+    def export_command(kind, output, date_from, date_to, billed, active_only):
+        """Stream an export to OUTPUT, as CSV or JSON Lines by its extension."""
+        import data_export
+
+        fmt = "jsonl" if output.endswith(".jsonl") else "csv"
+        filters = get_export_filters(kind, {
+            "date_from": date_from,
+            "date_to": date_to,
+            "billed": billed,
+            "active_only": "1" if active_only else None,
+        })
+        stream, _ = data_export.FORMATS[fmt]
+
+        with open(output, "w", encoding="utf-8", newline="") as f:
+            for chunk in stream(data_export.EXPORTS[kind](**filters)):
+                f.write(chunk)
+        print(f"{kind} exported to {output}.")
+
+    @app.cli.command("export-pdf-batch")
+    @click.argument("output", type=click.Path(dir_okay=False))
+    @click.option("--client-id", type=int)
+    @click.option("--case-type-id", type=int)
+    @click.option("--all-cases", is_flag=True, help="include inactive cases")
+    @click.option("--date-from", help="YYYY-MM-DD")
+    @click.option("--date-to", help="YYYY-MM-DD")
+    @click.option("--workers", type=int, help="render processes, defaults to the CPU count")
+    def export_pdf_batch_command(output, client_id, case_type_id, all_cases, date_from, date_to, workers):
+        """Render the unbilled work statement of every selected case into a zip."""
+        import pdf_batch
+
+        filters = get_batch_pdf_filters({
+            "client_id": client_id,
+            "case_type_id": case_type_id,
+            "active_only": None if all_cases else "1",
+            "date_from": date_from,
+            "date_to": date_to,
+        })
+        try:
+            result = pdf_batch.export_batch(output, filters, max_workers=workers)
+        except ValueError as e:
+            print(e)
+            raise SystemExit(1)
+
+        for timing in result["cases"]:
+            print(f"  {timing['case_number']:>8}  {timing['rows']:>6} rows  {timing['seconds']:.2f}s")
+        print(f"{len(result['cases'])} statements exported to {output} in {result['seconds']:.1f}s.")
+
+    @app.cli.command("bill-case")
+    @click.argument("case_number")
+    @click.option("--date-from", help="YYYY-MM-DD")
+    @click.option("--date-to", help="YYYY-MM-DD")
+    def bill_case_command(case_number, date_from, date_to):
+        """Mark the unbilled work of a case as billed and record an invoice."""
+        import billing
+
+        case = md.Case.query.filter_by(number=case_number).first()
+        if not case:
+            print(f"No case with the number {case_number}.")
+            raise SystemExit(1)
+        filters = get_billing_filters({"date_from": date_from, "date_to": date_to})
+        try:
+            invoice = billing.bill_case_works(case.id, **filters)
+        except ValueError as e:
+            print(e)
+            raise SystemExit(1)
+        print(f"Invoice {invoice.id}: {invoice.work_count} entries, "
+              f"{invoice.total_seconds / 3600:.2f} hours, {invoice.amount} HUF.")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Rebuild the full-text search index from the tables."""
+        import search
+
+        if not search.has_search_index():
+            print("There is no full-text search index on this database.")
+            raise SystemExit(1)
+        search.rebuild_search_index()
+        print("Search index rebuilt.")
+
+    @app.cli.command("list-backups")
+    def list_backups_command():
+        """List the snapshots in the backup store."""
+        for snapshot in get_backup_store().list_snapshots():
+            print(f"{snapshot['id']:>5}  {snapshot['created_at']}  "
+                  f"{snapshot['size'] / 1024 / 1024:8.1f} MB  {snapshot['new_pages']} new pages")
+
+    @app.cli.command("restore-backup")
+    @click.argument("snapshot_id", type=int)
+    @click.argument("target", type=click.Path(dir_okay=False))
+    def restore_backup_command(snapshot_id, target):
+        """Restore a backup snapshot into TARGET and check its integrity."""
+        with app.app_context():
+            live_db = db.engine.url.database
+        if os.path.abspath(target) == os.path.abspath(live_db):
+            print("Restore into a separate file, then replace database.db while Lexium is closed.")
+            raise SystemExit(1)
+
+        get_backup_store().restore(snapshot_id, target)
+        print(f"Snapshot {snapshot_id} restored to {target}, integrity check ok.")
+
+def query_reports(active_only=True):
+    # All three reports read the per case/user/billed rollups, which
+    # stay small no matter how many work entries there are.
+    rollup = md.CaseWorkRollup
+
+    # -----------------------------
+    # 1. Total worked hours per case
+    # -----------------------------
+    query1 = (
+        db.session.query(
+            md.Case.id.label("case_id"),
+            md.Case.number.label("case_number"),
+            md.Case.name.label("case_name"),
+            md.Client.name.label("client_name"),
+            (func.sum(rollup.total_seconds) / 3600).label("total_hours")
+        )
+        .join(rollup, rollup.case_id == md.Case.id)
+        .join(md.Client)
+    )
+
+    if active_only:
+        query1 = query1.filter(md.Case.is_active == True)
+
+    results1 = query1.group_by(md.Case.id, md.Client.name).order_by(md.Case.number).all()
+
+    # -----------------------------
+    # 2. Work per user
+    # -----------------------------
+    query2 = (
+        db.session.query(
+            md.User.username,
+            func.sum(rollup.total_seconds).label("total_seconds")
+        )
+        .join(rollup, rollup.user_id == md.User.id)
+    )
+
+    if active_only:
+        query2 = query2.join(md.Case, rollup.case_id == md.Case.id).filter(md.Case.is_active == True)
+
+    results2 = query2.group_by(md.User.username).order_by(
+        func.sum(rollup.total_seconds).desc()
+    ).all()
+
+    # -----------------------------
+    # 3. UNBILLED WORK PER CASE
+    # -----------------------------
+    query3 = (
+        db.session.query(
+            md.Case.number.label("case_number"),
+            md.Case.name.label("case_name"),
+            md.Client.name.label("client_name"),
+            (func.sum(rollup.total_seconds) / 3600).label("unbilled_hours"),
+            case(
+                (md.Case.billing_type == "hourly",
+                (func.sum(rollup.total_seconds) / 3600) * md.Case.rate_amount),
+                else_=md.Case.rate_amount
+            ).label("estimated_amount")
+        )
+        .join(rollup, rollup.case_id == md.Case.id)
+        .join(md.Client)
+        .filter(rollup.billed == False)
+    )
+
+    if active_only:
+        query3 = query3.filter(md.Case.is_active == True)
+
+    unbilled = query3.group_by(md.Case.id, md.Client.name).order_by(md.Case.number).all()
+
+    return {
+        "reports1": results1,
+        "reports2": results2,
+        "unbilled": unbilled
+    }
+
+def get_case_pdf_key(case):
+    """
+    Cache key of a case's summary PDF: the case and the state of its
+    unbilled work, which any insert, edit, delete or billing changes.
+    """
+    count, max_id, last_update, total_seconds = (
+        db.session.query(
+            func.count(md.CaseWork.id),
+            func.max(md.CaseWork.id),
+            func.max(md.CaseWork.updated_at),
+            func.sum(md.CaseWork.duration_seconds)
+        )
+        .filter(md.CaseWork.case_id == case.id, md.CaseWork.billed == False)
+        .one()
+    )
+    return (case.id, case.number, case.name, count, max_id, last_update, total_seconds)
+
+def get_case_pdf_etag(key):
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+def get_case_pdf(case, pdf_cache, progress=None):
+    """
+    Returns (PDF bytes, cache key, whether it came from the cache) for the
+    summary PDF of a case's unbilled work, rendering it only if it isn't
+    cached for the current state yet.
+    """
+    key = get_case_pdf_key(case)
+    data = pdf_cache.get(key)
+    if data is not None:
+        return data, key, True
+
+    import pdf_export  # imported on first use, reportlab is slow to import
+
+    works = (
+        md.CaseWork.query
+        .options(joinedload(md.CaseWork.user))
+        .filter_by(case_id=case.id, billed=False)
+        .order_by(md.CaseWork.date, md.CaseWork.start_time)
+        .all()
+    )
+    statement_case, statement_works = pdf_export.statement_rows(case, works)
+    data = pdf_export.build_case_pdf(statement_case, statement_works, progress=progress).getvalue()
+    pdf_cache.set(key, data)
+    return data, key, False
+
+def save_pdf(data, case_number):
+    """
+    Writes the PDF to a new, uniquely named file in the temp dir. The
+    content goes to a .part file first, so the file is never seen half
+    written.
+    """
+    fd, file_path = tempfile.mkstemp(prefix=f"case_{case_number}_report_", suffix=".pdf")
+    os.close(fd)  # only reserves the name
+    part_path = file_path + ".part"
+    with open(part_path, "wb") as f:
+        f.write(data)
+    os.replace(part_path, file_path)
+    return file_path
+
+def export_case_pdf_job(job, app, case_id, pdf_cache):
+    """
+    Job function: builds (or takes from the cache) the summary PDF of a
+    case's unbilled work. The page then loads it from
+    /cases/<number>/report.pdf, or with PDF_DELIVERY = "file" it is saved
+    to the temp dir and opened in the default PDF viewer.
+    """
+    with app.app_context():
+        case = db.session.get(md.Case, case_id)
+        data, _, cached = get_case_pdf(case, pdf_cache, progress=job.set_progress)
+        result = {"case_number": case.number, "cached": cached, "size": len(data)}
+
+    if app.config.get("PDF_DELIVERY") == "file":
+        result["path"] = save_pdf(data, result["case_number"])
+        webbrowser.open(result["path"])
+    return result
+
+def get_batch_pdf_filters(args):
+    """
+    Reads the case selection of a batch PDF export from a form or query
+    string (or CLI options passed as a dict).
+    """
+    def parse_date(value):
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+    def parse_id(value):
+        return int(value) if value else None
+
+    return {
+        "client_id": parse_id(args.get("client_id")),
+        "case_type_id": parse_id(args.get("case_type_id")),
+        "active_only": args.get("active_only") == "1",
+        "date_from": parse_date(args.get("date_from")),
+        "date_to": parse_date(args.get("date_to")),
+    }
+
+def get_billing_filters(args):
+    """
+    Reads the date range and the selected work entry ids (work_id, may
+    repeat) of a billing run from a form, or from CLI options passed as a
+    dict.
+    """
+    def parse_date(value):
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+    work_ids = args.getlist("work_id") if hasattr(args, "getlist") else args.get("work_id")
+    return {
+        "date_from": parse_date(args.get("date_from")),
+        "date_to": parse_date(args.get("date_to")),
+        "work_ids": [int(work_id) for work_id in work_ids] if work_ids else None,
+    }
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def export_batch_pdf_job(job, app, filters):
+    """
+    Job function: renders the statements of the selected cases into a zip
+    in the temp dir. The page downloads it from
+    /cases/export-pdf-batch/<job id>.zip, or with PDF_DELIVERY = "file" it
+    is opened right away. The zip is deleted with the job.
+    """
+    import pdf_batch
+
+    file_path = os.path.join(
+        tempfile.gettempdir(),
+        f"case_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job.id[:8]}.zip"
+    )
+    with app.app_context():
+        result = pdf_batch.export_batch(
+            file_path,
+            filters,
+            max_workers=app.config.get("BATCH_PDF_WORKERS"),
+            progress=job.set_progress
+        )
+
+    result["path"] = file_path
+    # deleted once the job is pruned, see jobs.FINISHED_JOB_TTL
+    job.add_cleanup(lambda: remove_file(file_path))
+    if app.config.get("PDF_DELIVERY") == "file":
+        webbrowser.open(file_path)
+    return result
+
+def get_export_filters(kind, args):
+    """
+    Reads the filters of a bulk export from the query string (or CLI
+    options passed as a dict).
+    """
+    def parse_date(value):
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+    if kind == "case-works":
+        billed = args.get("billed")
+        return {
+            "date_from": parse_date(args.get("date_from")),
+            "date_to": parse_date(args.get("date_to")),
+            "billed": None if billed in (None, "") else billed == "1",
+            "case_number": args.get("case_number") or None,
+        }
+    if kind == "cases":
+        return {"active_only": args.get("active_only") == "1"}
+    return {}
+
 def register_routes(app):
+    report_cache = cache.TTLCache(
+        "reports",
+        maxsize=app.config.get("REPORT_CACHE_SIZE", 32),
+        ttl=app.config.get("REPORT_CACHE_TTL", 300)
+    )
+    cache.invalidate_on_commit(report_cache, md.Case, md.CaseWork, md.Client, md.User)
+
+    # Generated case PDFs, keyed by the state of the case's unbilled work
+    # (see get_case_pdf_key). Usernames are printed too but aren't in the key.
+    pdf_cache = cache.TTLCache(
+        "case_pdf",
+        maxsize=app.config.get("PDF_CACHE_SIZE", 16),
+        ttl=app.config.get("PDF_CACHE_TTL", 3600)
+    )
+    cache.invalidate_on_commit(pdf_cache, md.User)
+
     @app.route('/')
     def home():
         return render_template("home.html")
 
-    @app.route("/cases/<case_number>/export-pdf")
+    @app.route("/cases/<case_number>/export-pdf", methods=["GET", "POST"])
     def export_case_pdf(case_number):
-        def clean_text(text):
-            if not text:
-                return "-"
-            if not isinstance(text, str):
-                return text
-            return text.replace("ő", "o").replace("Ő", "O")
-        
         # ---- Fetch Case ----
         case = md.Case.query.filter_by(number=case_number).first()
 
         if not case:
             return jsonify({"error": "Ügy nem található."}), 404
 
-        # ---- Fetch Works ----
-        works = (
-            md.CaseWork.query
-            .filter_by(case_id=case.id, billed=False)
-            .order_by(md.CaseWork.date, md.CaseWork.start_time)
-            .all()
-        )
+        has_works = db.session.query(
+            md.CaseWork.query.filter_by(case_id=case.id, billed=False).exists()
+        ).scalar()
 
-        if not works:
+        if not has_works:
             return jsonify({"error": "Nem található számlázatlan rögzített munka ehhez az ügyhöz."}), 404
 
-        # ---- PDF Setup ----
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=pagesizes.A4,
-            rightMargin=20,
-            leftMargin=20,
-            topMargin=20,
-            bottomMargin=20
+        # the PDF is built on the job queue, the page polls /jobs/<id>
+        job = app.extensions["jobs"].submit(
+            "case-pdf", export_case_pdf_job, app, case.id, pdf_cache,
+            description=f"{case.number} - {case.name}"
         )
+        return jsonify({"job_id": job.id, "delivery": app.config.get("PDF_DELIVERY", "inline")}), 202
 
-        # Define a style for wrapping text in the table
-        table_style = ParagraphStyle(
-            name="TableCell",
-            fontName="Helvetica",
-            fontSize=8,
-            leading=10,            # line height
-            alignment=TA_LEFT
-        )
+    @app.route("/cases/<case_number>/report.pdf")
+    def case_pdf(case_number):
+        case = md.Case.query.filter_by(number=case_number).first()
+        if not case:
+            return jsonify({"error": "Ügy nem található."}), 404
 
-        elements = []
-        styles = getSampleStyleSheet()
+        key = get_case_pdf_key(case)
+        if not key[3]:  # no unbilled work
+            return jsonify({"error": "Nem található számlázatlan rögzített munka ehhez az ügyhöz."}), 404
 
-        # ---- Title ----
-        elements.append(
-            Paragraph(
-                f"<b>Ügy összefoglaló</b><br/>{case.number} - {clean_text(case.name)}",
-                styles["Heading1"]
+        # the browser revalidates every time, an unchanged PDF costs one query
+        etag = get_case_pdf_etag(key)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+        else:
+            # normally cached by the export job, rendered here if it was evicted since
+            data, key, _ = get_case_pdf(case, pdf_cache)
+            response = send_file(
+                BytesIO(data),
+                mimetype="application/pdf",
+                download_name=f"case_{case.number}_report.pdf",
+                etag=get_case_pdf_etag(key),
+                max_age=0
             )
-        )
-        elements.append(Spacer(1, 0.4 * inch))
-
-        # ---- Table Header ----
-        data = [[
-            "Dátum",
-            "Felhasználó",
-            "Kezdet",
-            "Vége",
-            "Idotartam (h)",
-            "Leírás"
-        ]]
-
-        total_seconds = 0
-
-        # ---- Table Rows ----
-        for w in works:
-            duration_hours = round(w.duration_seconds / 3600, 2)
-            total_seconds += w.duration_seconds
-
-            row = [
-                Paragraph(w.date.strftime("%Y-%m-%d"), table_style),
-                Paragraph(clean_text(w.user.username) if w.user else "-", table_style),
-                Paragraph(w.start_time.strftime("%H:%M"), table_style),
-                Paragraph(w.end_time.strftime("%H:%M"), table_style),
-                Paragraph(f"{duration_hours}", table_style),
-                Paragraph(clean_text(w.description) or "-", table_style)
-            ]
-            data.append(row)
-
-        total_hours = round(total_seconds / 3600, 2)
-
-        # ---- Create Table ----
-        table = Table(
-            data,
-            repeatRows=1,
-            colWidths = [60, 95, 45, 45, 60, 225],
-            splitByRow=1  # allows row to break over pages
-        )
-
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c3e50")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-
-            ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+            response.content_length = len(data)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
 
-            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-            ("FONTSIZE", (0, 0), (-1, -1), 8),
-
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-
-            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [
-                colors.whitesmoke,
-                colors.transparent
-            ])
-        ]))
-
-        elements.append(table)
-        elements.append(Spacer(1, 0.4 * inch))
+    @app.route("/cases/export-pdf-batch", methods=["POST"])
+    def export_case_pdf_batch():
+        try:
+            filters = get_batch_pdf_filters(request.form)
+        except ValueError:
+            return jsonify({"error": "Hibás szűrési feltétel."}), 400
 
-        # ---- Total Summary ----
-        elements.append(
-            Paragraph(
-                f"<b>Összesített óraszám:</b> {total_hours} h",
-                styles["Heading2"]
-            )
+        job = app.extensions["jobs"].submit(
+            "case-pdf-batch", export_batch_pdf_job, app, filters,
+            description="Ügy összefoglalók (ZIP)"
+        )
+        return jsonify({"job_id": job.id, "delivery": app.config.get("PDF_DELIVERY", "inline")}), 202
+
+    @app.route("/cases/export-pdf-batch/<job_id>.zip")
+    def case_pdf_batch_zip(job_id):
+        job = app.extensions["jobs"].get(job_id)
+        if job is None or job.kind != "case-pdf-batch" or job.status != jobs.DONE:
+            return jsonify({"error": "A feladat nem található vagy még nem készült el."}), 404
+        if not os.path.exists(job.result["path"]):
+            return jsonify({"error": "A ZIP fájl már nem érhető el."}), 404
+
+        return send_file(
+            job.result["path"],
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name=os.path.basename(job.result["path"]),
+            max_age=0
         )
 
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-
-        # Save to temp file
-        temp_dir = tempfile.gettempdir()
-        file_path = os.path.join(temp_dir, f"case_{case.number}_report.pdf")
-
-        with open(file_path, "wb") as f:
-            f.write(buffer.read())
+    @app.route("/cases/<case_number>/bill", methods=["POST"])
+    def bill_case(case_number):
+        import billing
 
-        # Open with default system PDF viewer
-        webbrowser.open(file_path)
+        case = md.Case.query.filter_by(number=case_number).first()
+        if not case:
+            return jsonify({"error": "Ügy nem található."}), 404
+        try:
+            filters = get_billing_filters(request.form)
+        except ValueError:
+            return jsonify({"error": "Hibás szűrési feltétel."}), 400
 
+        try:
+            invoice = billing.bill_case_works(case.id, **filters)
+        except ValueError as e:
+            # the case exists, it just has no unbilled work in the range
+            return jsonify({"error": str(e)}), 409
+        return jsonify(invoice.to_dict()), 201
+
+    @app.route("/cases/<case_number>/invoices")
+    def case_invoices(case_number):
+        case = md.Case.query.filter_by(number=case_number).first()
+        if not case:
+            return jsonify({"error": "Ügy nem található."}), 404
+        invoices = md.Invoice.query.filter_by(case_id=case.id).order_by(md.Invoice.id.desc()).all()
+        return jsonify([invoice.to_dict() for invoice in invoices])
+
+    @app.route("/invoices/<int:invoice_id>")
+    def invoice_detail(invoice_id):
+        import billing
+
+        invoice = db.session.get(md.Invoice, invoice_id)
+        if not invoice:
+            return jsonify({"error": "Számla nem található."}), 404
+        return jsonify({**invoice.to_dict(), "work_ids": billing.get_invoice_work_ids(invoice.id)})
+
+    @app.route("/search")
+    def search_view():
+        import search
+
+        kind = request.args.get("kind") or None
+        if kind and kind not in search.KINDS:
+            return jsonify({"error": "Ismeretlen találattípus."}), 400
+
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        results = search.search(request.args.get("q", ""), kind=kind, limit=limit, offset=offset)
+
+        urls = {
+            "case": lambda r: url_for("edit_case", case_id=r["id"]),
+            "client": lambda r: url_for("edit_client", client_id=r["id"]),
+            "work": lambda r: url_for("edit_case_work", case_work_id=r["id"]),
+        }
+        for result in results:
+            result["url"] = urls[result["kind"]](result)
+        return jsonify(results)
+
+    @app.route("/jobs")
+    def list_jobs():
+        return jsonify([job.to_dict() for job in app.extensions["jobs"].list()])
+
+    @app.route("/jobs/<job_id>")
+    def job_status(job_id):
+        job = app.extensions["jobs"].get(job_id)
+        if job is None:
+            return jsonify({"error": "A feladat nem található."}), 404
+        return jsonify(job.to_dict())
+
+    @app.route("/jobs/<job_id>/cancel", methods=["POST"])
+    def cancel_job(job_id):
+        if not app.extensions["jobs"].cancel(job_id):
+            return jsonify({"error": "A feladat már befejeződött vagy nem létezik."}), 409
         return jsonify({"success": True})
 
     @app.route("/reports")
     def reports():
         active_only = request.args.get("active_only", "1") == "1"  # default checked
 
-        # -----------------------------
-        # 1. Total worked hours per case
-        # -----------------------------
-        query1 = (
-            db.session.query(
-                md.Case.id.label("case_id"),
-                md.Case.number.label("case_number"),
-                md.Case.name.label("case_name"),
-                md.Client.name.label("client_name"),
-                (func.sum(md.CaseWork.duration_seconds) / 3600).label("total_hours")
-            )
-            .join(md.CaseWork)
-            .join(md.Client)
-        )
-
-        if active_only:
-            query1 = query1.filter(md.Case.is_active == True)
-
-        results1 = query1.group_by(md.Case.id, md.Client.name).order_by(md.Case.number).all()
-
-        # -----------------------------
-        # 2. Work per user
-        # -----------------------------
-        query2 = (
-            db.session.query(
-                md.User.username,
-                func.sum(md.CaseWork.duration_seconds).label("total_seconds")
-            )
-            .join(md.CaseWork)
-        )
-
-        if active_only:
-            query2 = query2.join(md.Case).filter(md.Case.is_active == True)
-
-        results2 = query2.group_by(md.User.username).order_by(
-            func.sum(func.strftime('%s', md.CaseWork.end_time) -
-                    func.strftime('%s', md.CaseWork.start_time)).desc()
-        ).all()
-
-        # -----------------------------
-        # 3. UNBILLED WORK PER CASE
-        # -----------------------------
-        query3 = (
-            db.session.query(
-                md.Case.number.label("case_number"),
-                md.Case.name.label("case_name"),
-                md.Client.name.label("client_name"),
-                (func.sum(md.CaseWork.duration_seconds) / 3600).label("unbilled_hours"),
-                case(
-                    (md.Case.billing_type == "hourly",
-                    (func.sum(md.CaseWork.duration_seconds) / 3600) * md.Case.rate_amount),
-                    else_=md.Case.rate_amount
-                ).label("estimated_amount")
-            )
-            .join(md.CaseWork)
-            .join(md.Client)
-            .filter(md.CaseWork.billed == False)
-        )
-
-        if active_only:
-            query3 = query3.filter(md.Case.is_active == True)
-
-        unbilled = query3.group_by(md.Case.id, md.Client.name).order_by(md.Case.number).all()
+        report_filters = {"active_only": active_only}
+        cache_key = tuple(sorted(report_filters.items()))
+        results = report_cache.get_or_set(cache_key, lambda: query_reports(**report_filters))
 
         return render_template(
             "reports.html",
-            reports1=results1,
-            reports2=results2,
-            unbilled=unbilled,
-            active_only=active_only
+            active_only=active_only,
+            case_types=dbu.get_all_case_types(active_only=True),
+            **results
         )
 
+    @app.route("/backup-status")
+    def get_backup_status():
+        return jsonify(backup_status)
+
+    @app.route("/cache-stats")
+    def cache_stats():
+        return jsonify(cache.all_cache_stats())
+
     @app.route("/edit-outsource-company/<int:company_id>", methods=["GET", "POST"])
     def edit_outsource_company(company_id):
         company = db.session.get(md.OutsourceCompany, company_id)
@@ -393,10 +959,11 @@ def register_routes(app):
     @app.route("/delete-client/<int:client_id>", methods=["POST"])
     def delete_client(client_id):
         try:
-            client = md.Client.query.get_or_404(client_id)
+            import bulk
 
-            db.session.delete(client)
-            db.session.commit()
+            md.Client.query.get_or_404(client_id)
+            # with its cases, and their work entries and invoices
+            bulk.delete_clients([client_id])
 
             flash("Az ügyfél sikeresen törölve lett.", "success")
             return redirect(url_for("client_table"))
@@ -424,8 +991,6 @@ def register_routes(app):
 
     @app.route("/input_case_work", methods=["GET", "POST"])
     def input_case_work():
-        users = dbu.get_all_users()
-        cases = dbu.get_all_cases()
         if request.method == "POST":
             try:
                 user_id = int(request.form.get("user_id"))
@@ -448,27 +1013,19 @@ def register_routes(app):
 
                 if not all([user_id, case_id, date_obj, start_time, end_time]):
                     return render_template("input_case_work.html",
-                                        users=users,
-                                        cases=cases,
                                         error="Minden mező kitöltése kötelező!")
 
                 # create case work object and save to database
                 dbu.create_case_work(user_id, case_id, date_obj, start_time, end_time, description)
 
                 return render_template("input_case_work.html",
-                                    users=users,
-                                    cases=cases,
                                     message="Munkalap sikeresen elmentve!")
             except Exception as e:
                 print(tb.format_exc())
                 return render_template("input_case_work.html",
-                                    users=users,
-                                    cases=cases,
                                     error="Hiba történt a munkalap mentésekor.")
         # GET request
-        return render_template("input_case_work.html",
-                            users=users,
-                            cases=cases)
+        return render_template("input_case_work.html")
 
     @app.route("/edit-case/<int:case_id>", methods=["GET", "POST"])
     def edit_case(case_id):
@@ -484,7 +1041,6 @@ def register_routes(app):
                     return render_template(
                         "edit_case.html",
                         case=case,
-                        clients=dbu.get_all_clients(),
                         case_types=dbu.get_all_case_types(),
                         companies=dbu.get_all_outsource_companies(),
                         BillingType=md.BillingType,
@@ -507,7 +1063,6 @@ def register_routes(app):
             return render_template(
                 "edit_case.html",
                 case=case,
-                clients=dbu.get_all_clients(),
                 case_types=dbu.get_all_case_types(),
                 companies=dbu.get_all_outsource_companies(),
                 BillingType=md.BillingType
@@ -541,8 +1096,6 @@ def register_routes(app):
             if not all([user_id, case_id, date_obj, start_time, end_time]):
                 return render_template("edit_case_work.html",
                                     case_work=case_work,
-                                    users=dbu.get_all_users(),
-                                    cases=dbu.get_all_cases(),
                                     error="Minden mező (kivéve a leírást) kitöltése kötelező!")
             
             case_work.user_id = user_id
@@ -556,12 +1109,7 @@ def register_routes(app):
             db.session.commit()
             return redirect(url_for("case_work_table"))
         elif request.method == "GET":
-            print(dbu.get_all_users())
-            return render_template(
-                "edit_case_work.html",
-                case_work=case_work,
-                users=dbu.get_all_users(),
-                cases=dbu.get_all_cases())
+            return render_template("edit_case_work.html", case_work=case_work)
         else:
             return jsonify({"message": "Method not allowed"}), 405
     
@@ -571,7 +1119,8 @@ def register_routes(app):
         if not user:
             return jsonify({"message": "User not found"}), 404
         if request.method == "POST":
-            if dbu.get_user_by_username(request.form.get("username")) and dbu.get_user_by_username(request.form.get("username")).id != user_id:
+            existing = dbu.get_user_by_username(request.form.get("username"))
+            if existing and existing.id != user_id:
                 return render_template("edit_user.html", user=user, error="Ez a felhasználónév már foglalt.")
             user.username = request.form.get("username")
             user.first_name = request.form.get("first_name")
@@ -605,10 +1154,11 @@ def register_routes(app):
     @app.route("/delete-case/<int:case_id>")
     def delete_case(case_id):
         try:
-            case = md.Case.query.get_or_404(case_id)
+            import bulk
 
-            db.session.delete(case)
-            db.session.commit()
+            md.Case.query.get_or_404(case_id)
+            # with its work entries and invoices
+            bulk.delete_cases([case_id])
 
             flash("Az ügy sikeresen törölve lett.", "success")
             return redirect(url_for("case_table"))
@@ -618,19 +1168,112 @@ def register_routes(app):
             flash("Hiba történt az ügy törlésekor.", "danger")
             return redirect(url_for("case_table"))
     
+    # --------------------
+    # Bulk edit and delete, JSON in and out
+    # --------------------
+
+    def run_bulk(operation):
+        import bulk
+
+        data = request.get_json(silent=True) or {}
+        try:
+            return jsonify(operation(bulk, data))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(tb.format_exc())
+            return jsonify({"error": "Hiba történt a művelet során."}), 500
+
+    @app.route("/case-works/bulk-delete", methods=["POST"])
+    def bulk_delete_case_works():
+        return run_bulk(lambda bulk, data: {
+            "deleted": bulk.delete_case_works(**get_case_work_selection(data))
+        })
+
+    @app.route("/case-works/bulk-update", methods=["POST"])
+    def bulk_update_case_works():
+        return run_bulk(lambda bulk, data: {
+            "updated": bulk.update_case_works(
+                get_bulk_values(data, bulk.CASE_WORK_FIELDS), **get_case_work_selection(data)
+            )
+        })
+
+    @app.route("/cases/bulk-delete", methods=["POST"])
+    def bulk_delete_cases():
+        return run_bulk(lambda bulk, data: {"deleted": bulk.delete_cases(get_bulk_ids(data))})
+
+    @app.route("/cases/bulk-update", methods=["POST"])
+    def bulk_update_cases():
+        return run_bulk(lambda bulk, data: {
+            "updated": bulk.update_cases(get_bulk_values(data, bulk.CASE_FIELDS), get_bulk_ids(data))
+        })
+
+    @app.route("/clients/bulk-delete", methods=["POST"])
+    def bulk_delete_clients():
+        return run_bulk(lambda bulk, data: {"deleted": bulk.delete_clients(get_bulk_ids(data))})
+
+    @app.route("/users/bulk-delete", methods=["POST"])
+    def bulk_delete_users():
+        return run_bulk(lambda bulk, data: {"deleted": bulk.delete_users(get_bulk_ids(data))})
+
     @app.route("/case-work-table", methods=["GET"])
     def case_work_table():
-        case_works = dbu.get_all_case_works()
-        return render_template("case_work_table.html", case_works=case_works)
+        try:
+            page_args = get_case_work_page_args(request.args)
+            case_works, next_cursor = dbu.get_case_works_page(**page_args)
+        except ValueError:
+            abort(400)
+        return render_template("case_work_table.html",
+                               case_works=case_works,
+                               next_cursor=next_cursor,
+                               users=dbu.get_all_users(),
+                               sort=page_args["sort"],
+                               direction=page_args["direction"],
+                               filters=request.args)
+
+    @app.route("/case-work-table/page", methods=["GET"])
+    def case_work_table_page():
+        try:
+            page_args = get_case_work_page_args(request.args)
+            case_works, next_cursor = dbu.get_case_works_page(**page_args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "html": render_template("case_work_rows.html", case_works=case_works),
+            "next_cursor": next_cursor
+        })
     
     @app.route("/user-table", methods=["GET"])
     def user_table():
         users = dbu.get_all_users()
         return render_template("user_table.html", users=users)
     
+    @app.route("/import-case-works", methods=["GET", "POST"])
+    def import_case_works():
+        if request.method == "POST":
+            upload = request.files.get("file")
+            if not upload or not upload.filename:
+                return render_template("import_case_work.html", error="Válassz ki egy fájlt!")
+
+            import work_import
+            try:
+                result = work_import.import_case_works(work_import.iter_rows(upload.stream, upload.filename))
+            except ValueError as e:
+                return render_template("import_case_work.html", error=f"Hibás fájl: {e}")
+            except Exception as e:
+                print(tb.format_exc())
+                return render_template("import_case_work.html", error="Hiba történt az importálás során.")
+
+            return render_template("import_case_work.html",
+                                   message=f"{result['imported']} munka sikeresen importálva.",
+                                   errors=result["errors"])
+
+        # GET request
+        return render_template("import_case_work.html")
+
     @app.route("/input_case", methods=["GET", "POST"])
     def input_case():
-        clients = dbu.get_all_clients()
         if request.method == "POST":
             try:
                 # Get form data
@@ -640,7 +1283,7 @@ def register_routes(app):
                 billing_type = data.get('billing_type')
                 rate_amount = data.get('rate_amount')
                 if not case_name or not client_id or not billing_type and not rate_amount:
-                    return render_template("input_case.html", clients=clients,
+                    return render_template("input_case.html",
                                            companies=dbu.get_all_outsource_companies(),
                                             case_types=dbu.get_all_case_types(),
                                             error="Az ügy neve, az ügyfél, a díjazás típusa és a díj mértéke kiválasztása kötelező.")
@@ -656,19 +1299,19 @@ def register_routes(app):
                     outsource_company_id=int(data.get('outsource_company_id')) if data.get('is-outsourced') == 'on' else None,
                     case_type_id=int(data.get('case_type_id')) if data.get('case_type_id') else None
                 )
-                return render_template("input_case.html", clients=clients,
+                return render_template("input_case.html",
                                        companies=dbu.get_all_outsource_companies(),
                                         case_types=dbu.get_all_case_types(),
                                         message="Sikeresen hozzáadva!")
             except Exception as e:
                 print(tb.format_exc())
-                return render_template("input_case.html", clients=clients,
+                return render_template("input_case.html",
                                        companies=dbu.get_all_outsource_companies(),
                                        case_types=dbu.get_all_case_types(),
                                        error="Hiba történt az ügy felvételénél.")
 
         # GET request
-        return render_template("input_case.html", clients=clients,
+        return render_template("input_case.html",
                                companies=dbu.get_all_outsource_companies(),
                                case_types=dbu.get_all_case_types())
 
@@ -702,15 +1345,36 @@ def register_routes(app):
         # GET request
         return render_template('input_user.html')
     
+    @app.route("/export/<kind>.<fmt>")
+    def export_data(kind, fmt):
+        import data_export
+
+        if kind not in data_export.EXPORTS or fmt not in data_export.FORMATS:
+            abort(404)
+        try:
+            filters = get_export_filters(kind, request.args)
+        except ValueError:
+            abort(400)
+
+        stmt = data_export.EXPORTS[kind](**filters)
+        stream, mimetype = data_export.FORMATS[fmt]
+        filename = f"{kind}_{date.today().isoformat()}.{fmt}"
+        return Response(
+            stream_with_context(stream(stmt)),
+            mimetype=f"{mimetype}; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
     @app.route('/get-users', methods=['GET'])
     def get_users():
         try:
-            users = md.User.query.all()
+            users = dbu.search_users(**get_lookup_args(request.args))
             return jsonify([
                 {
                     "id": u.id,
                     "username": u.username,
-                    "email": u.email
+                    "first_name": u.first_name,
+                    "last_name": u.last_name
                 } for u in users
             ])
         except Exception as e:
@@ -720,15 +1384,25 @@ def register_routes(app):
     @app.route('/get-cases', methods=['GET'])
     def get_cases():
         try:
-            cases = md.Case.query.all()
+            cases = dbu.search_cases(
+                active_only=request.args.get("active_only", "1") != "0",
+                **get_lookup_args(request.args)
+            )
             return jsonify([
-                {
-                    "id": c.id,
-                    "number": c.number,
-                    "name": c.name,
-                    "client_id": c.client_id,
-                    "description": c.description
-                } for c in cases
+                {"id": c.id, "number": c.number, "name": c.name}
+                for c in cases
+            ])
+        except Exception as e:
+            print(tb.format_exc())
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/get-clients', methods=['GET'])
+    def get_clients():
+        try:
+            clients = dbu.search_clients(**get_lookup_args(request.args))
+            return jsonify([
+                {"id": c.id, "name": c.name, "tax_number": c.tax_number}
+                for c in clients
             ])
         except Exception as e:
             print(tb.format_exc())
@@ -789,11 +1463,16 @@ def register_routes(app):
         cal = calendar.Calendar(firstweekday=0)  # 0 = Monday
         month_days = []
 
+        # Load the whole month in one query instead of one per day
+        first_day = date(current_year, current_month, 1)
+        last_day = date(current_year, current_month, calendar.monthrange(current_year, current_month)[1])
+        works_by_date = dbu.get_case_works_between(first_day, last_day)
+
         for week in cal.monthdatescalendar(current_year, current_month):
             week_list = []
             for day_date in week:
                 if day_date.month == current_month:
-                    works = dbu.get_case_works_by_date(day_date)
+                    works = works_by_date.get(day_date, [])
                     week_list.append({"date": day_date, "works": works})
                 else:
                     week_list.append({"date": None, "works": []})
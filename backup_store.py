@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+
+# Pages are content-addressed by a 16 byte BLAKE2b digest
+DIGEST_SIZE = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL,
+    refcount INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    page_size INTEGER NOT NULL,
+    page_count INTEGER NOT NULL,
+    new_pages INTEGER NOT NULL,
+    manifest BLOB NOT NULL
+);
+"""
+
+
+def read_page_size(db_file: str) -> int:
+    """
+    Reads the page size from the SQLite file header.
+    """
+    with open(db_file, "rb") as f:
+        header = f.read(100)
+    if not header.startswith(b"SQLite format 3\x00"):
+        raise ValueError(f"{db_file} is not an SQLite database.")
+    page_size = int.from_bytes(header[16:18], "big")
+    return 65536 if page_size == 1 else page_size
+
+
+class BackupStore:
+    """
+    Deduplicated backup store. Every snapshot is split into SQLite pages,
+    each distinct page is stored once (zlib compressed), and a snapshot is
+    only the list of its page hashes. Successive backups of a database
+    therefore only cost the pages that changed in between.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def add_snapshot(self, db_file: str):
+        """
+        Stores a consistent copy of a database (e.g. made with the SQLite
+        backup API) as a new snapshot. Returns (snapshot id, new page count).
+        """
+        page_size = read_page_size(db_file)
+        conn = self._connect()
+        try:
+            digests = []
+            new_pages = 0
+            with conn, open(db_file, "rb") as f:
+                while True:
+                    page = f.read(page_size)
+                    if not page:
+                        break
+                    digest = hashlib.blake2b(page, digest_size=DIGEST_SIZE).digest()
+                    digests.append(digest)
+
+                    updated = conn.execute(
+                        "UPDATE pages SET refcount = refcount + 1 WHERE hash = ?", (digest,)
+                    ).rowcount
+                    if not updated:
+                        conn.execute(
+                            "INSERT INTO pages (hash, data, refcount) VALUES (?, ?, 1)",
+                            (digest, zlib.compress(page))
+                        )
+                        new_pages += 1
+
+                cursor = conn.execute(
+                    "INSERT INTO snapshots (created_at, page_size, page_count, new_pages, manifest) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (datetime.now().isoformat(timespec="seconds"), page_size,
+                     len(digests), new_pages, b"".join(digests))
+                )
+            return cursor.lastrowid, new_pages
+        finally:
+            conn.close()
+
+    def list_snapshots(self):
+        conn = self._connect()
+        try:
+            return [
+                {
+                    "id": row[0],
+                    "created_at": row[1],
+                    "size": row[2] * row[3],
+                    "new_pages": row[4],
+                }
+                for row in conn.execute(
+                    "SELECT id, created_at, page_size, page_count, new_pages FROM snapshots ORDER BY id"
+                )
+            ]
+        finally:
+            conn.close()
+
+    def restore(self, snapshot_id: int, target: str):
+        """
+        Reassembles a snapshot into target and checks it with
+        PRAGMA integrity_check. The target is only replaced once the check
+        passed.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT manifest FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"No backup snapshot with id {snapshot_id}.")
+            manifest = row[0]
+
+            partial = target + ".part"
+            with open(partial, "wb") as out:
+                for offset in range(0, len(manifest), DIGEST_SIZE):
+                    digest = manifest[offset:offset + DIGEST_SIZE]
+                    data = conn.execute(
+                        "SELECT data FROM pages WHERE hash = ?", (digest,)
+                    ).fetchone()[0]
+                    out.write(zlib.decompress(data))
+        finally:
+            conn.close()
+
+        check = sqlite3.connect(partial)
+        try:
+            result = check.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            check.close()
+        if result != "ok":
+            os.remove(partial)
+            raise ValueError(f"Restored snapshot {snapshot_id} failed the integrity check: {result}")
+
+        os.replace(partial, target)
+        # a WAL left over from the replaced database would be applied to the restored one
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(target + suffix):
+                os.remove(target + suffix)
+
+    def prune(self, keep: int):
+        """
+        Removes all but the newest keep snapshots, and the pages no
+        remaining snapshot refers to.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                old = conn.execute(
+                    "SELECT id, manifest FROM snapshots ORDER BY id DESC LIMIT -1 OFFSET ?", (keep,)
+                ).fetchall()
+                for snapshot_id, manifest in old:
+                    conn.executemany(
+                        "UPDATE pages SET refcount = refcount - 1 WHERE hash = ?",
+                        ((manifest[o:o + DIGEST_SIZE],) for o in range(0, len(manifest), DIGEST_SIZE))
+                    )
+                    conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+                conn.execute("DELETE FROM pages WHERE refcount <= 0")
+            return len(old)
+        finally:
+            conn.close()
@@ -0,0 +1,160 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Select, func, select
+
+import cache
+import rollups
+from db import db
+from models import BillingType, Case, CaseWork, Invoice
+
+CENTS = Decimal("0.01")
+
+
+def invoice_amount(billing_type, rate_amount, total_seconds, fee_charged=False):
+    """
+    Hourly cases are billed by the hours worked, fixed fee cases by their
+    rate, the same as the unbilled work report estimates. The fixed fee is
+    due once per case: later runs (fee_charged) only record the work.
+    """
+    rate_amount = Decimal(rate_amount or 0)
+    if billing_type == BillingType.HOURLY:
+        return (Decimal(total_seconds) / 3600 * rate_amount).quantize(CENTS)
+    if fee_charged:
+        return Decimal(0).quantize(CENTS)
+    return rate_amount.quantize(CENTS)
+
+
+def fixed_fee_charged(case_id):
+    """
+    True if an earlier fixed fee invoice of the case charged the fee.
+    """
+    return db.session.scalar(
+        select(func.count()).select_from(Invoice).where(
+            Invoice.case_id == case_id,
+            Invoice.billing_type == BillingType.FIXED,
+            Invoice.amount != 0
+        )
+    ) > 0
+
+
+def bill_case_works(case_id, date_from=None, date_to=None, work_ids=None):
+    """
+    Marks the case's unbilled work entries as billed, optionally only the
+    ones between date_from and date_to or with the given ids, and records
+    an Invoice snapshot of them. One UPDATE for the entries, the rollups
+    adjusted per user, all in one transaction.
+
+    Returns the Invoice. Raises ValueError if there is nothing to bill.
+    """
+    case = db.session.get(Case, case_id)
+    if case is None:
+        raise ValueError("Ügy nem található.")
+
+    try:
+        invoice = create_invoice(case, date_from, date_to, work_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return invoice
+
+
+def create_invoice(case, date_from=None, date_to=None, work_ids=None):
+    """
+    bill_case_works in the current transaction, without committing.
+    work_ids may also be a select of ids.
+    """
+    work = CaseWork.__table__
+    conditions = [work.c.case_id == case.id, work.c.billed == False]
+    if date_from:
+        conditions.append(work.c.date >= date_from)
+    if date_to:
+        conditions.append(work.c.date <= date_to)
+    if work_ids is not None:
+        conditions.append(work.c.id.in_(work_ids if isinstance(work_ids, Select) else list(work_ids)))
+
+    invoice = Invoice(
+        case_id=case.id,
+        date_from=date_from,
+        date_to=date_to,
+        billing_type=case.billing_type,
+        rate_amount=case.rate_amount
+    )
+    db.session.add(invoice)
+    db.session.flush()
+
+    # Core update: one statement however many entries there are. The
+    # entries it took are then read back by invoice_id, so rows
+    # written in between can't skew the totals.
+    db.session.execute(
+        work.update()
+        .where(*conditions)
+        .values(billed=True, invoice_id=invoice.id, updated_at=datetime.now())
+    )
+    cache.mark_changed(db.session, CaseWork)
+
+    per_user = db.session.execute(
+        select(
+            work.c.user_id,
+            func.sum(work.c.duration_seconds).label("seconds"),
+            func.count().label("count")
+        )
+        .where(work.c.invoice_id == invoice.id)
+        .group_by(work.c.user_id)
+    ).all()
+    if not per_user:
+        raise ValueError("Nem található számlázatlan rögzített munka ehhez az ügyhöz.")
+
+    connection = db.session.connection()
+    for row in per_user:
+        rollups.apply_delta(connection, case.id, row.user_id, False, -row.seconds, -row.count)
+        rollups.apply_delta(connection, case.id, row.user_id, True, row.seconds, row.count)
+
+    invoice.total_seconds = sum(row.seconds for row in per_user)
+    invoice.work_count = sum(row.count for row in per_user)
+    invoice.amount = invoice_amount(
+        case.billing_type, case.rate_amount, invoice.total_seconds,
+        fee_charged=case.billing_type == BillingType.FIXED and fixed_fee_charged(case.id)
+    )
+    return invoice
+
+
+def refresh_invoices(invoice_ids):
+    """
+    Recomputes the totals of the invoices after entries left them (marked
+    unbilled), in the current transaction. An invoice without entries
+    left is deleted. A fixed fee stays as it was charged.
+    """
+    if not invoice_ids:
+        return
+    work = CaseWork.__table__
+    totals = {
+        row.invoice_id: row
+        for row in db.session.execute(
+            select(
+                work.c.invoice_id,
+                func.sum(work.c.duration_seconds).label("seconds"),
+                func.count().label("count")
+            )
+            .where(work.c.invoice_id.in_(invoice_ids))
+            .group_by(work.c.invoice_id)
+        )
+    }
+    for invoice in db.session.scalars(select(Invoice).where(Invoice.id.in_(invoice_ids))):
+        row = totals.get(invoice.id)
+        if row is None:
+            db.session.delete(invoice)
+            continue
+        invoice.total_seconds = row.seconds
+        invoice.work_count = row.count
+        invoice.amount = invoice_amount(
+            invoice.billing_type, invoice.rate_amount, row.seconds,
+            fee_charged=invoice.billing_type == BillingType.FIXED and invoice.amount == 0
+        )
+
+
+def get_invoice_work_ids(invoice_id):
+    return db.session.scalars(
+        select(CaseWork.id).where(CaseWork.invoice_id == invoice_id).order_by(CaseWork.id)
+    ).all()
@@ -0,0 +1,244 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+import billing
+import cache
+import db_utils
+import reference_cache
+import rollups
+from db import db
+from models import (Case, CaseWork, CaseWorkRollup, Client, ClientCompany, ClientPerson,
+                    Invoice, User)
+
+# Set-based counterparts of the table views' single row edit and delete.
+# Every operation is a handful of Core statements in one transaction, the
+# report rollups of the affected cases are recomputed at the end. The
+# search index follows through its triggers.
+
+case_work = CaseWork.__table__
+cases = Case.__table__
+clients = Client.__table__
+invoices = Invoice.__table__
+case_work_rollups = CaseWorkRollup.__table__
+
+# Columns a bulk edit may set
+CASE_WORK_FIELDS = ("billed", "user_id", "case_id")
+CASE_FIELDS = ("is_active", "case_type_id")
+
+# --------------------
+# Helpers
+# --------------------
+
+def _case_work_condition(ids=None, filters=None):
+    """
+    The given case work ids, or the rows matching the case work table
+    filters (see db_utils.filter_case_works). The filtered ids are read
+    through a derived table, as MySQL can't otherwise change a table a
+    subquery reads.
+    """
+    if ids is not None:
+        if not ids:
+            raise ValueError("Nincs kijelölt sor.")
+        return case_work.c.id.in_(ids)
+    if not filters:
+        raise ValueError("Adj meg legalább egy szűrési feltételt.")
+
+    matching = db_utils.filter_case_works(
+        db.session.query(CaseWork.id)
+        .join(User, CaseWork.user_id == User.id)
+        .join(Case, CaseWork.case_id == Case.id),
+        **filters
+    ).subquery()
+    return case_work.c.id.in_(select(matching.c.id))
+
+
+def _run(operation):
+    try:
+        result = operation()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
+
+
+def _delete_cases_where(condition):
+    """
+    Deletes the cases matching condition with their work entries,
+    invoices and rollups. Returns the deleted row counts.
+    """
+    case_ids = select(cases.c.id).where(condition)
+    invoice_ids = select(invoices.c.id).where(invoices.c.case_id.in_(case_ids))
+    # entries of other cases can still point at these invoices
+    db.session.execute(
+        case_work.update().where(case_work.c.invoice_id.in_(invoice_ids)).values(invoice_id=None)
+    )
+    deleted = {
+        "case_work": db.session.execute(case_work.delete().where(case_work.c.case_id.in_(case_ids))).rowcount
+    }
+    db.session.execute(invoices.delete().where(invoices.c.case_id.in_(case_ids)))
+    db.session.execute(case_work_rollups.delete().where(case_work_rollups.c.case_id.in_(case_ids)))
+    deleted["cases"] = db.session.execute(cases.delete().where(condition)).rowcount
+    cache.mark_changed(db.session, CaseWork, Invoice, Case)
+    return deleted
+
+# --------------------
+# Case work
+# --------------------
+
+def delete_case_works(ids=None, filters=None):
+    """
+    Deletes the case work entries with the given ids, or the ones matching
+    filters. Returns the number of deleted entries.
+    """
+    condition = _case_work_condition(ids, filters)
+
+    def operation():
+        affected_cases = db.session.scalars(select(case_work.c.case_id).where(condition).distinct()).all()
+        deleted = db.session.execute(case_work.delete().where(condition)).rowcount
+        cache.mark_changed(db.session, CaseWork)
+        rollups.refresh_rollups(db.session.connection(), affected_cases)
+        return deleted
+
+    return _run(operation)
+
+
+def update_case_works(values, ids=None, filters=None):
+    """
+    Sets values (billed, user_id and/or case_id) on the case work entries
+    with the given ids, or the ones matching filters. Marking entries as
+    billed goes through billing.py: the unbilled ones get an invoice per
+    case. Entries marked as unbilled leave their invoice, which is
+    recomputed. Invoiced entries can't be moved to another case, the
+    invoice belongs to theirs. Returns the number of selected entries.
+    """
+    values = {key: values[key] for key in CASE_WORK_FIELDS if key in values}
+    if not values:
+        raise ValueError("Nincs módosítandó mező.")
+    if values.get("billed") is True and len(values) > 1:
+        raise ValueError("A számlázottnak jelölés más módosítással együtt nem lehetséges.")
+    if "user_id" in values and reference_cache.users.get(values["user_id"]) is None:
+        raise ValueError("Felhasználó nem található.")
+    if "case_id" in values and db.session.get(Case, values["case_id"]) is None:
+        raise ValueError("Ügy nem található.")
+    if values.get("billed") is False:
+        values["invoice_id"] = None
+    condition = _case_work_condition(ids, filters)
+
+    def bill():
+        selected = db.session.scalar(select(func.count()).where(condition))
+        # through a derived table, the invoice's UPDATE reads it (see _case_work_condition)
+        unbilled_rows = select(case_work.c.id).where(condition, case_work.c.billed == False).subquery()
+        unbilled = select(unbilled_rows.c.id)
+        case_ids = db.session.scalars(
+            select(case_work.c.case_id).where(case_work.c.id.in_(unbilled)).distinct()
+        ).all()
+        for case in db.session.scalars(select(Case).where(Case.id.in_(case_ids))):
+            billing.create_invoice(case, work_ids=unbilled)
+        return selected
+
+    def operation():
+        if "case_id" in values:
+            invoiced = db.session.scalar(
+                select(func.count()).where(
+                    condition,
+                    case_work.c.invoice_id.is_not(None),
+                    case_work.c.case_id != values["case_id"]
+                )
+            )
+            if invoiced and values.get("billed") is not False:
+                raise ValueError(f"{invoiced} kijelölt munka már számlázva lett, nem helyezhető át másik ügyhöz.")
+        affected_cases = set(db.session.scalars(select(case_work.c.case_id).where(condition).distinct()))
+        if "case_id" in values:
+            affected_cases.add(values["case_id"])
+        affected_invoices = []
+        if "invoice_id" in values:
+            affected_invoices = db.session.scalars(
+                select(case_work.c.invoice_id).where(condition, case_work.c.invoice_id.is_not(None)).distinct()
+            ).all()
+        updated = db.session.execute(
+            case_work.update().where(condition).values(**values, updated_at=datetime.now())
+        ).rowcount
+        cache.mark_changed(db.session, CaseWork)
+        billing.refresh_invoices(affected_invoices)
+        rollups.refresh_rollups(db.session.connection(), list(affected_cases))
+        return updated
+
+    return _run(bill if values.get("billed") is True else operation)
+
+# --------------------
+# Cases, clients, users
+# --------------------
+
+def delete_cases(ids):
+    """
+    Deletes the cases with their work entries and invoices. Returns the
+    deleted row counts.
+    """
+    if not ids:
+        raise ValueError("Nincs kijelölt sor.")
+    return _run(lambda: _delete_cases_where(cases.c.id.in_(ids)))
+
+
+def update_cases(values, ids):
+    """
+    Sets values (is_active and/or case_type_id) on the cases. Returns the
+    number of updated cases.
+    """
+    values = {key: values[key] for key in CASE_FIELDS if key in values}
+    if not ids:
+        raise ValueError("Nincs kijelölt sor.")
+    if not values:
+        raise ValueError("Nincs módosítandó mező.")
+    if values.get("case_type_id") is not None and reference_cache.case_types.get(values["case_type_id"]) is None:
+        raise ValueError("Ügytípus nem található.")
+
+    def operation():
+        updated = db.session.execute(cases.update().where(cases.c.id.in_(ids)).values(**values)).rowcount
+        cache.mark_changed(db.session, Case)
+        return updated
+
+    return _run(operation)
+
+
+def delete_clients(ids):
+    """
+    Deletes the clients with their cases, and those with their work
+    entries and invoices. Returns the deleted row counts.
+    """
+    if not ids:
+        raise ValueError("Nincs kijelölt sor.")
+
+    def operation():
+        deleted = _delete_cases_where(cases.c.client_id.in_(ids))
+        for table in (ClientPerson.__table__, ClientCompany.__table__):
+            db.session.execute(table.delete().where(table.c.id.in_(ids)))
+        deleted["clients"] = db.session.execute(clients.delete().where(clients.c.id.in_(ids))).rowcount
+        cache.mark_changed(db.session, Client)
+        return deleted
+
+    return _run(operation)
+
+
+def delete_users(ids):
+    """
+    Deletes the users. Users with work entries are kept, their work would
+    be lost with them: raises ValueError if any is selected. Returns the
+    number of deleted users.
+    """
+    if not ids:
+        raise ValueError("Nincs kijelölt sor.")
+    users = User.__table__
+
+    def operation():
+        in_use = db.session.scalar(
+            select(func.count(func.distinct(case_work.c.user_id))).where(case_work.c.user_id.in_(ids))
+        )
+        if in_use:
+            raise ValueError(f"{in_use} kijelölt felhasználóhoz rögzített munka tartozik, őket nem lehet törölni.")
+        deleted = db.session.execute(users.delete().where(users.c.id.in_(ids))).rowcount
+        cache.mark_changed(db.session, User)
+        return deleted
+
+    return _run(operation)
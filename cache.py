@@ -0,0 +1,152 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# All caches by name, for the stats endpoint
+_caches = weakref.WeakValueDictionary()
+
+# cache -> watched model classes, see invalidate_on_commit. Weak, so the
+# caches of an app that is gone (tests create many) don't pile up.
+_watchers = weakref.WeakKeyDictionary()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a time to live and LRU eviction.
+    Counts hits, misses and evictions.
+    """
+
+    def __init__(self, name, maxsize=128, ttl=300):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by clear(), see get_or_set
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        register(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_set(self, key, factory):
+        value = self.get(key, _missing)
+        if value is _missing:
+            generation = self._generation
+            value = factory()
+            # A value computed while a commit cleared the cache may predate
+            # that commit: it's returned, but not cached.
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_missing = object()
+
+
+def register(cache):
+    """
+    Lists the cache (anything with a name and a stats() method) in
+    all_cache_stats().
+    """
+    _caches[cache.name] = cache
+
+
+def all_cache_stats():
+    return {name: cache.stats() for name, cache in list(_caches.items())}
+
+
+def invalidate_on_commit(cache, *model_classes):
+    """
+    Clears the cache whenever a transaction that changed any of the given
+    model classes (or their subclasses) is committed. Calling it again for
+    the same cache replaces the watched classes.
+    """
+    _watchers[cache] = tuple(model_classes)
+
+# --------------------
+# Session events
+# --------------------
+
+def mark_changed(session, *classes):
+    """
+    Marks the given model classes as changed in the session's current
+    transaction. Needed after Core statements on mapped tables, which the
+    session events can't attribute to a model.
+    """
+    pending = session.info.setdefault("changed_caches", set())
+    for cache, watched in list(_watchers.items()):
+        if any(issubclass(cls, watched) for cls in classes):
+            pending.add(cache)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    classes = {type(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    mark_changed(session, *classes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    # bulk inserts, query.update() and query.delete() bypass the flush
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and orm_execute_state.bind_mapper:
+        mark_changed(orm_execute_state.session, orm_execute_state.bind_mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session):
+    for cache in session.info.pop("changed_caches", ()):
+        cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("changed_caches", None)
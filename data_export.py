@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+from datetime import date, time
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from db import db
+from models import Case, CaseType, CaseWork, Client, ClientCompany, ClientPerson, OutsourceCompany, User
+
+# Rows fetched from the database cursor at a time
+YIELD_PER = 1000
+
+# --------------------
+# Queries
+# --------------------
+# Every export is a single SELECT with the joins done in SQL, so rows can be
+# streamed straight from the cursor without loading ORM objects.
+
+def case_works_query(date_from=None, date_to=None, billed=None, case_number=None):
+    stmt = (
+        select(
+            CaseWork.id,
+            CaseWork.date,
+            CaseWork.start_time,
+            CaseWork.end_time,
+            (CaseWork.duration_seconds / 3600.0).label("hours"),
+            User.username,
+            Case.number.label("case_number"),
+            Case.name.label("case_name"),
+            Client.name.label("client_name"),
+            CaseWork.description,
+            CaseWork.billed
+        )
+        .join(User, CaseWork.user_id == User.id)
+        .join(Case, CaseWork.case_id == Case.id)
+        .join(Client, Case.client_id == Client.id)
+        .order_by(CaseWork.date, CaseWork.start_time, CaseWork.id)
+    )
+    if date_from:
+        stmt = stmt.where(CaseWork.date >= date_from)
+    if date_to:
+        stmt = stmt.where(CaseWork.date <= date_to)
+    if billed is not None:
+        stmt = stmt.where(CaseWork.billed == billed)
+    if case_number:
+        stmt = stmt.where(Case.number == case_number)
+    return stmt
+
+
+def cases_query(active_only=False):
+    stmt = (
+        select(
+            Case.id,
+            Case.number,
+            Case.name,
+            Client.name.label("client_name"),
+            Client.client_type,
+            CaseType.name.label("case_type"),
+            Case.billing_type,
+            Case.rate_amount,
+            Case.is_active,
+            Case.is_outsourced,
+            OutsourceCompany.name.label("outsource_company"),
+            Case.description
+        )
+        .join(Client, Case.client_id == Client.id)
+        .outerjoin(CaseType, Case.case_type_id == CaseType.id)
+        .outerjoin(OutsourceCompany, Case.outsource_company_id == OutsourceCompany.id)
+        .order_by(Case.number)
+    )
+    if active_only:
+        stmt = stmt.where(Case.is_active == True)
+    return stmt
+
+
+def clients_query():
+    persons = ClientPerson.__table__
+    companies = ClientCompany.__table__
+    clients = Client.__table__
+    return (
+        select(
+            clients.c.id,
+            clients.c.name,
+            clients.c.tax_number,
+            clients.c.client_type,
+            persons.c.birth_date,
+            persons.c.address,
+            companies.c.headquarters
+        )
+        .select_from(clients)
+        .outerjoin(persons, persons.c.id == clients.c.id)
+        .outerjoin(companies, companies.c.id == clients.c.id)
+        .order_by(clients.c.name, clients.c.id)
+    )
+
+
+EXPORTS = {
+    "case-works": case_works_query,
+    "cases": cases_query,
+    "clients": clients_query,
+}
+
+# --------------------
+# Streaming
+# --------------------
+
+def _plain_value(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):  # enums, e.g. BillingType
+        return value.value
+    return value
+
+
+def iter_rows(stmt):
+    """
+    Executes stmt with a server-side style cursor, YIELD_PER rows at a
+    time, and yields each row as a dict of plain values.
+    """
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    columns = list(result.keys())
+    for partition in result.partitions():
+        for row in partition:
+            yield {column: _plain_value(value) for column, value in zip(columns, row)}
+
+
+def stream_csv(stmt, rows_per_chunk=500):
+    """
+    Yields the CSV text in chunks of rows_per_chunk rows.
+    """
+    buffer = io.StringIO()
+    writer = None
+    count = 0
+    for row in iter_rows(stmt):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow({key: int(value) if isinstance(value, bool) else value for key, value in row.items()})
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if writer is None:  # no rows, still emit the header
+        csv.writer(buffer).writerow(list(stmt.selected_columns.keys()))
+    yield buffer.getvalue()
+
+
+def stream_jsonl(stmt, rows_per_chunk=500):
+    """
+    Yields JSON Lines text, one object per row, in chunks.
+    """
+    lines = []
+    for row in iter_rows(stmt):
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "jsonl": (stream_jsonl, "application/x-ndjson"),
+}
@@ -1,9 +1,14 @@
 from db import db
-from models import Case, CaseWork, Client, ClientPerson, ClientCompany, User, CaseType
+from models import Case, CaseWork, Client, ClientPerson, ClientCompany, User
 from sqlalchemy.exc import SQLAlchemyError
-from models import CaseWork
-from sqlalchemy.orm import joinedload
-from datetime import date as DateType
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import contains_eager, joinedload, with_polymorphic
+from datetime import date as DateType, time as TimeType
+import base64
+import json
+
+import reference_cache
+import search
 
 # --------------------
 # Generic helpers
@@ -38,11 +43,30 @@ def delete_instance(instance):
 # --------------------
 # User utilities
 # --------------------
+# Users, case types and outsource companies are read from the process-local
+# snapshots in reference_cache: immutable namedtuples, not ORM objects.
+# Load the model through the session to change a row.
+
 def get_all_users():
-    return User.query.all()
+    return reference_cache.users.all()
+
+def get_user_by_id(user_id):
+    return reference_cache.users.get(user_id)
 
 def get_user_by_username(username):
-    return User.query.filter_by(username=username).first()
+    return reference_cache.users.get_by_name(username)
+
+
+def search_users(q=None, limit=20, offset=0):
+    """
+    One page of (id, username, first_name, last_name) rows for the user
+    typeahead, the ones whose username or name starts with the words of q.
+    """
+    query = User.query.with_entities(User.id, User.username, User.first_name, User.last_name)
+    condition = search.like_prefix_filter(q or "", [User.username, User.first_name, User.last_name])
+    if condition is not None:
+        query = query.filter(condition)
+    return query.order_by(User.username).limit(limit).offset(offset).all()
 # --------------------
 # Case utilities
 # --------------------
@@ -61,7 +85,30 @@ def get_case_by_id(case_id):
 
 
 def get_all_cases():
-    return Case.query.all()
+    return (
+        Case.query
+        .options(
+            joinedload(Case.client),
+            joinedload(Case.case_type)
+        )
+        .all()
+    )
+
+
+def search_cases(q=None, active_only=True, limit=20, offset=0):
+    """
+    One page of (id, number, name) rows for the case typeahead, ordered by
+    number. q matches word prefixes of the number and the name, or any
+    part of the number: "12" finds 00012, the way numbers are typed.
+    """
+    query = Case.query.with_entities(Case.id, Case.number, Case.name)
+    if active_only:
+        query = query.filter(Case.is_active == True)
+    condition = search.prefix_filter(q or "", "case", Case.id, [Case.number, Case.name],
+                                     contains_columns=[Case.number])
+    if condition is not None:
+        query = query.filter(condition)
+    return query.order_by(Case.number).limit(limit).offset(offset).all()
 
 
 def get_cases_by_client(client_id):
@@ -80,17 +127,19 @@ def update_case(case_id, **kwargs):
     commit_session()
     return case
 
-from models import OutsourceCompany
-
 def get_all_outsource_companies():
     """
-    Returns a list of all outsource companies.
+    Returns all outsource companies, ordered by name.
     """
     try:
-        return OutsourceCompany.query.order_by(OutsourceCompany.name).all()
+        return reference_cache.outsource_companies.all()
     except Exception as e:
         print(f"Error fetching outsource companies: {e}")
         return []
+
+
+def get_outsource_company_by_id(company_id):
+    return reference_cache.outsource_companies.get(company_id)
     
 def delete_case(case_id):
     case = get_case_by_id(case_id)
@@ -105,8 +154,11 @@ def get_case_by_number(case_number):
 # Case type utilities
 # --------------------
 
-def get_all_case_types():
-    return CaseType.query.all()
+def get_all_case_types(active_only=False):
+    case_types = reference_cache.case_types.all()
+    if active_only:
+        return [case_type for case_type in case_types if case_type.active]
+    return case_types
 # --------------------
 # CaseWork utilities
 # --------------------
@@ -138,8 +190,167 @@ def get_case_works_by_date(day: DateType):
         .all()
     )
 
+def get_case_works_between(start: DateType, end: DateType):
+    """
+    Returns all CaseWork entries between start and end (inclusive),
+    bucketed by date. Loads everything in one query so views
+    spanning several days (e.g. the calendar) don't query per day.
+    """
+    works = (
+        CaseWork.query
+        .options(
+            joinedload(CaseWork.user),
+            joinedload(CaseWork.case)
+        )
+        .filter(CaseWork.date >= start, CaseWork.date <= end)
+        .order_by(CaseWork.date, CaseWork.start_time)
+        .all()
+    )
+
+    works_by_date = {}
+    for work in works:
+        works_by_date.setdefault(work.date, []).append(work)
+    return works_by_date
+
 def get_all_case_works():
-    return CaseWork.query.all()
+    return (
+        CaseWork.query
+        .options(
+            joinedload(CaseWork.user),
+            joinedload(CaseWork.case)
+        )
+        .all()
+    )
+
+# Sortable columns of the case work table. Every sort key ends with
+# CaseWork.id so the ordering is total and can be used as a keyset cursor.
+CASE_WORK_SORT_KEYS = {
+    "id": [CaseWork.id],
+    "user": [User.username, CaseWork.id],
+    "case": [Case.number, CaseWork.id],
+    "date": [CaseWork.date, CaseWork.start_time, CaseWork.id],
+    "start_time": [CaseWork.start_time, CaseWork.id],
+    "end_time": [CaseWork.end_time, CaseWork.id],
+    "description": [func.coalesce(CaseWork.description, ""), CaseWork.id],
+    "billed": [CaseWork.billed, CaseWork.id],
+}
+
+CASE_WORK_PAGE_SIZE = 100
+
+
+def _cursor_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_cursor_value(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decodes a cursor produced by encode_cursor back to python values,
+    typed after the given sort columns. Raises ValueError if the cursor
+    is malformed or doesn't match the columns.
+    """
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Cursor does not match the sort key.")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        if value is None:
+            decoded.append(value)
+        elif python_type in (str, int, bool):
+            # bool is an int to isinstance, but never a valid id
+            if type(value) is not python_type:
+                raise ValueError("Cursor does not match the sort key.")
+            decoded.append(value)
+        elif not isinstance(value, str):
+            raise ValueError("Cursor does not match the sort key.")
+        elif python_type is DateType:
+            decoded.append(DateType.fromisoformat(value))
+        else:  # time
+            decoded.append(TimeType.fromisoformat(value))
+    return decoded
+
+
+def filter_case_works(query, q=None, user_id=None, case_id=None, case_number=None,
+                      billed=None, date_from=None, date_to=None):
+    """
+    Applies the case work table filters to a query which is already
+    joined to User and Case.
+    """
+    if q:
+        pattern = f"%{q}%"
+        query = query.filter(or_(
+            CaseWork.description.ilike(pattern),
+            User.username.ilike(pattern),
+            Case.number.ilike(pattern),
+            Case.name.ilike(pattern)
+        ))
+    if user_id:
+        query = query.filter(CaseWork.user_id == user_id)
+    if case_id:
+        query = query.filter(CaseWork.case_id == case_id)
+    if case_number:
+        query = query.filter(Case.number.ilike(f"{case_number}%"))
+    if billed is not None:
+        query = query.filter(CaseWork.billed == billed)
+    if date_from:
+        query = query.filter(CaseWork.date >= date_from)
+    if date_to:
+        query = query.filter(CaseWork.date <= date_to)
+    return query
+
+
+def get_case_works_page(sort="date", direction="desc", cursor=None,
+                        limit=CASE_WORK_PAGE_SIZE, **filters):
+    """
+    Returns one page of CaseWork entries using keyset (seek) pagination.
+    Sorting and filtering happen in SQL; the returned cursor points after
+    the last row of the page and is None on the last page.
+    """
+    columns = CASE_WORK_SORT_KEYS.get(sort)
+    if columns is None:
+        raise ValueError(f"Unknown sort key: {sort}")
+    descending = direction == "desc"
+
+    query = (
+        CaseWork.query
+        .join(CaseWork.user)
+        .join(CaseWork.case)
+        .options(
+            contains_eager(CaseWork.user),
+            contains_eager(CaseWork.case)
+        )
+    )
+    query = filter_case_works(query, **filters)
+
+    if cursor:
+        last_values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*last_values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*last_values))
+
+    order_by = [c.desc() if descending else c.asc() for c in columns]
+    rows = (
+        query
+        .add_columns(*columns)
+        .order_by(*order_by)
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    works = [row[0] for row in rows]
+    next_cursor = encode_cursor(rows[-1][1:]) if has_more else None
+    return works, next_cursor
 
 def get_case_work_by_id(case_work_id):
     return CaseWork.query.get(case_work_id)
@@ -188,7 +399,21 @@ def get_client_by_id(client_id):
 
 
 def get_all_clients():
-    return Client.query.all()
+    # load the subclass columns (address, headquarters, ...) in the same query
+    client_poly = with_polymorphic(Client, [ClientPerson, ClientCompany])
+    return db.session.query(client_poly).all()
+
+
+def search_clients(q=None, limit=20, offset=0):
+    """
+    One page of (id, name, tax_number) rows for the client typeahead,
+    ordered by name. q matches word prefixes of the name and the tax number.
+    """
+    query = Client.query.with_entities(Client.id, Client.name, Client.tax_number)
+    condition = search.prefix_filter(q or "", "client", Client.id, [Client.name, Client.tax_number])
+    if condition is not None:
+        query = query.filter(condition)
+    return query.order_by(Client.name, Client.id).limit(limit).offset(offset).all()
 
 
 def delete_client(client_id):
@@ -1,21 +1,195 @@
+import argparse
+import html
+import multiprocessing
+import socket
 import threading
-import webview
-from app import create_app
+import time
 
-def run_flask():
-    app = create_app()
-    app.run(host="127.0.0.1", port=5000, debug=False)
+import startup_timing
 
-if __name__ == "__main__":
-    flask_thread = threading.Thread(target=run_flask)
-    flask_thread.daemon = True
-    flask_thread.start()
-
-    window = webview.create_window(
-        title="Lexium",
-        url="http://127.0.0.1:5000",
-        maximized=True,
-        resizable=True
+HOST = "127.0.0.1"
+PORT = 5000
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# waitress settings, see serve()
+SERVER_THREADS = 8              # requests handled in parallel
+SERVER_CONNECTION_LIMIT = 100   # open connections at most
+SERVER_BACKLOG = 64             # connections waiting to be accepted
+SERVER_CHANNEL_TIMEOUT = 120    # seconds an idle keep-alive connection stays open
+
+# Shown right away, while the app starts up behind it
+LOADING_HTML = """
+<html>
+  <body style="display:flex;align-items:center;justify-content:center;height:100vh;margin:0;
+               font-family:'Segoe UI',Tahoma,Geneva,Verdana,sans-serif;background:#f4f6f8;color:#555">
+    <h2>Lexium betöltése...</h2>
+  </body>
+</html>
+"""
+
+# Shown instead of the app if it couldn't start
+ERROR_HTML = """
+<html>
+  <body style="display:flex;flex-direction:column;align-items:center;justify-content:center;height:100vh;
+               margin:0;font-family:'Segoe UI',Tahoma,Geneva,Verdana,sans-serif;background:#f4f6f8;color:#555">
+    <h2>A Lexium nem tudott elindulni.</h2>
+    <p>{message}</p>
+  </body>
+</html>
+"""
+
+def wait_for_server(host, port, timeout=30, server_thread=None):
+    """
+    Waits until the server accepts connections. Returns False after
+    timeout seconds, or as soon as server_thread stopped (e.g. the port
+    is taken).
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            if server_thread is not None and not server_thread.is_alive():
+                return False
+            time.sleep(0.05)
+    return False
+
+def serve(app, options):
+    """
+    Serves the app with waitress, a multi-threaded production WSGI server,
+    or with Flask's development server if asked to or if waitress is
+    missing.
+    """
+    if options.server == "waitress":
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            print("waitress is not installed, falling back to the Flask development server.")
+        else:
+            waitress_serve(
+                app,
+                host=options.host,
+                port=options.port,
+                threads=options.threads,
+                connection_limit=options.connection_limit,
+                backlog=options.backlog,
+                channel_timeout=options.channel_timeout,
+                ident="Lexium"
+            )
+            return
+
+    app.run(host=options.host, port=options.port, debug=False, threaded=True)
+
+def show_startup_error(window, message):
+    print(f"Startup failed: {message}")
+    window.load_html(ERROR_HTML.format(message=html.escape(message)))
+
+def start_app(window, options):
+    try:
+        with startup_timing.phase("import app"):
+            from app import create_app
+            from db import run_deferred_startup
+
+        with startup_timing.phase("create_app"):
+            app = create_app({"DEFER_STARTUP_TASKS": True})
+    except Exception as e:
+        show_startup_error(window, str(e))
+        raise
+
+    server_thread = threading.Thread(target=serve, args=(app, options))
+    server_thread.daemon = True
+    server_thread.start()
+
+    with startup_timing.phase("wait for server"):
+        started = wait_for_server(options.host, options.port, server_thread=server_thread)
+    if not started:
+        show_startup_error(window, f"A szerver nem indult el ({options.host}:{options.port}). "
+                                   "Lehet, hogy a portot egy másik program használja.")
+        return
+    window.load_url(f"http://{options.host}:{options.port}")
+    startup_timing.mark("app page requested")
+
+    # backup, PRAGMA optimize, ... once the user already sees the app
+    run_deferred_startup(app)
+
+    if options.startup_report:
+        startup_timing.print_report()
+
+def run_headless(options):
+    """
+    Only the web server, without a window, e.g. to serve the other
+    machines of an office LAN with --host 0.0.0.0. PDFs and zips are
+    always downloaded through the browser then: a file opened on the
+    server machine wouldn't reach the user.
+    """
+    from app import create_app
+
+    app = create_app({"PDF_DELIVERY": "inline"})
+    if options.host not in LOOPBACK_HOSTS:
+        print(f"WARNING: Lexium has no login, everyone who can reach {options.host}:{options.port} "
+              "can view, change and delete all data. Only listen on a trusted network.")
+    print(f"Lexium is running on http://{options.host}:{options.port}, press Ctrl+C to stop.")
+    serve(app, options)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lexium")
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print import times and startup phase timings"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run only the web server, without the app window"
+    )
+    parser.add_argument(
+        "--host",
+        default=HOST,
+        help=f"address to listen on (default {HOST}). There is no login: with any other "
+             "address, e.g. 0.0.0.0, everyone on the network can view, change and delete all data"
+    )
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "--server",
+        choices=("waitress", "flask"),
+        default="waitress",
+        help="WSGI server, the Flask one is meant for development"
+    )
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS)
+    parser.add_argument("--connection-limit", type=int, default=SERVER_CONNECTION_LIMIT)
+    parser.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    parser.add_argument(
+        "--channel-timeout",
+        type=int,
+        default=SERVER_CHANNEL_TIMEOUT,
+        help="seconds an idle keep-alive connection is kept open"
     )
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    # the batch PDF export renders in worker processes, which a frozen
+    # (PyInstaller) build has to be able to start
+    multiprocessing.freeze_support()
+
+    args = parse_args()
+
+    if args.startup_report:
+        startup_timing.track_imports()
+
+    if args.headless:
+        run_headless(args)
+    else:
+        with startup_timing.phase("import webview"):
+            import webview
+
+        window = webview.create_window(
+            title="Lexium",
+            html=LOADING_HTML,
+            maximized=True,
+            resizable=True
+        )
+        window.events.shown += lambda: startup_timing.mark("window shown")
 
-    webview.start()
\ No newline at end of file
+        webview.start(start_app, (window, args))
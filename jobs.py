@@ -0,0 +1,176 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Finished jobs are kept this long (seconds) so the UI can still poll them
+FINISHED_JOB_TTL = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    One unit of background work. The job function receives the Job and
+    should call job.set_progress() now and then, which also raises
+    JobCancelled once cancellation was requested.
+    """
+
+    def __init__(self, kind, description=""):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel_requested = threading.Event()
+        self._cleanups = []
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_requested.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+
+    def set_progress(self, done, total):
+        self.check_cancelled()
+        self.progress = min(done / total, 1.0) if total else 1.0
+
+    def add_cleanup(self, fn):
+        """
+        Registers fn() to run when the job is discarded, e.g. to delete a
+        file its result points to.
+        """
+        self._cleanups.append(fn)
+
+    def discard(self):
+        for fn in self._cleanups:
+            try:
+                fn()
+            except Exception as e:
+                print(f"Cleanup of job {self.kind} {self.id} failed: {e}")
+        self._cleanups = []
+
+    def is_finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def to_dict(self):
+        seconds = None
+        if self.started_at:
+            seconds = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "description": self.description,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "seconds": seconds,
+            "result": self.result if self.status == DONE else None,
+        }
+
+
+class JobQueue:
+    """
+    In-process job queue on a bounded thread pool. Jobs are tracked by ID
+    for status polling and can be cancelled while queued or, at their
+    next progress check, while running.
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, description="", **kwargs):
+        """
+        Queues fn(job, *args, **kwargs) and returns the Job. Its return
+        value becomes job.result.
+        """
+        job = Job(kind, description)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    @staticmethod
+    def _finish(job, status):
+        # finished_at first: other threads take a finished status to mean
+        # finished_at is set (see _prune)
+        job.finished_at = time.time()
+        job.status = status
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, CANCELLED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            status = DONE
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            print(f"Job {job.kind} {job.id} failed: {e}")
+            job.error = str(e)
+            status = FAILED
+        self._finish(job, status)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id):
+        """
+        Requests cancellation. Returns False if there's no such job or it
+        has already finished.
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return False
+
+        job._cancel_requested.set()
+        if job.future is not None and job.future.cancel():
+            # never started, _run won't be called
+            self._finish(job, CANCELLED)
+        return True
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL
+        for job_id, job in list(self._jobs.items()):
+            finished_at = job.finished_at
+            if job.is_finished() and finished_at is not None and finished_at < cutoff:
+                del self._jobs[job_id]
+                job.discard()
+
+    def shutdown(self, wait=False):
+        for job in self.list():
+            job._cancel_requested.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        for job in self.list():
+            if job.is_finished():
+                job.discard()
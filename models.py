@@ -1,7 +1,6 @@
 from db import db
 import enum
-from sqlalchemy import Enum, Integer, cast, func
-from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy import Enum, event
 from datetime import datetime, timedelta
 
 class BillingType(enum.Enum):
@@ -40,7 +39,7 @@ class CaseType(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(45), nullable=False, unique=True)
     active = db.Column(db.Boolean, default=True, nullable=False)
-    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.text("CURRENT_TIMESTAMP"), nullable=False)
 
     def __init__(self, name=None, active=True):
         self.name = name
@@ -72,6 +71,13 @@ class Case(db.Model):
     case_type_id = db.Column(db.Integer, db.ForeignKey('case_types.id'), nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_cases_client_id", "client_id"),
+        db.Index("ix_cases_is_active", "is_active"),
+        db.Index("ix_cases_is_active_number", "is_active", "number"),  # case typeahead
+        db.Index("ix_cases_case_type_id", "case_type_id"),
+    )
+
     # Relationships
     client = db.relationship("Client", back_populates="cases")
     works = db.relationship("CaseWork", back_populates="case", lazy=True)
@@ -116,7 +122,8 @@ class Case(db.Model):
         new_case.number = str(new_case.id).zfill(5)
 
         if new_case.is_outsourced:
-            outsource_company = OutsourceCompany.query.get(outsource_company_id)
+            import reference_cache
+            outsource_company = reference_cache.outsource_companies.get(outsource_company_id)
             short_name = outsource_company.short_name or ""
             new_case.number = f"{short_name}{new_case.number}"
 
@@ -143,13 +150,35 @@ class CaseWork(db.Model):
     __tablename__ = 'case_work'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
+    # active_history: the rollup events (rollups.py) need the old value even
+    # when the attribute was expired, e.g. by a commit, before the change
+    user_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False), active_history=True
+    )
+    case_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False), active_history=True
+    )
     date = db.Column(db.Date, nullable=False)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     description = db.Column(db.String(255), nullable=True)
-    billed = db.Column(db.Boolean, default=False, nullable=False)
+    billed = db.column_property(db.Column(db.Boolean, default=False, nullable=False), active_history=True)
+    # Stored so reports can SUM it directly, kept up to date by the ORM events below
+    duration_seconds = db.column_property(
+        db.Column(db.Integer, nullable=False, default=0, server_default="0"), active_history=True
+    )
+    # Last insert/update, part of the PDF cache key. NULL for rows from before the column existed.
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
+    # The billing run which marked the entry as billed, see billing.py
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id'), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_case_work_date_start_time", "date", "start_time"),     # calendar, work table
+        db.Index("ix_case_work_case_id_billed_date", "case_id", "billed", "date"),  # pdf export, unbilled report
+        db.Index("ix_case_work_user_id_date", "user_id", "date"),          # per-user report
+        db.Index("ix_case_work_case_id_billed_duration", "case_id", "billed", "duration_seconds"),  # report sums
+        db.Index("ix_case_work_invoice_id", "invoice_id"),
+    )
 
     # Relationships
     user = db.relationship("User", back_populates="case_works")
@@ -170,20 +199,107 @@ class CaseWork(db.Model):
             "billed": self.billed
         }
     
-    @hybrid_property
-    def duration_seconds(self):
-        if self.start_time and self.end_time:
-            start_dt = datetime.combine(self.date, self.start_time)
-            end_dt = datetime.combine(self.date, self.end_time)
-            return (end_dt - start_dt).total_seconds()
+    @staticmethod
+    def calculate_duration_seconds(work_date, start_time, end_time):
+        if work_date and start_time and end_time:
+            start_dt = datetime.combine(work_date, start_time)
+            end_dt = datetime.combine(work_date, end_time)
+            return int((end_dt - start_dt).total_seconds())
         return 0
 
-    @duration_seconds.expression
-    def duration_seconds(cls):
-        return (
-            cast(func.strftime('%s', cls.end_time), Integer) -
-            cast(func.strftime('%s', cls.start_time), Integer)
-        )
+
+@event.listens_for(CaseWork, "before_insert")
+@event.listens_for(CaseWork, "before_update")
+def set_case_work_duration(mapper, connection, target):
+    target.duration_seconds = CaseWork.calculate_duration_seconds(
+        target.date, target.start_time, target.end_time
+    )
+
+
+class AppMetadata(db.Model):
+    """
+    Key/value pairs about the database itself, e.g. the schema version it
+    was last upgraded to.
+    """
+    __tablename__ = 'app_metadata'
+
+    key = db.Column(db.String(45), primary_key=True)
+    value = db.Column(db.String(255), nullable=True)
+
+    def __repr__(self):
+        return f'<AppMetadata {self.key}={self.value}>'
+
+
+# ----------------------------
+# INVOICES
+# ----------------------------
+class Invoice(db.Model):
+    """
+    Snapshot of one billing run of a case: the totals of the work entries
+    it marked as billed, priced with the case's billing type and rate at
+    that time. The entries point back to it through CaseWork.invoice_id.
+    """
+    __tablename__ = 'invoices'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    # the date range the run was limited to, if any
+    date_from = db.Column(db.Date, nullable=True)
+    date_to = db.Column(db.Date, nullable=True)
+    billing_type = db.Column(Enum(BillingType, values_callable=lambda enum: [e.value for e in enum]), nullable=False)
+    rate_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+    work_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_invoices_case_id", "case_id"),
+    )
+
+    case = db.relationship("Case")
+
+    def __repr__(self):
+        return f'<Invoice {self.id} for Case {self.case_id}>'
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "case_id": self.case_id,
+            "created_at": self.created_at,
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+            "billing_type": self.billing_type.value,
+            "rate_amount": str(self.rate_amount),
+            "hours": round(self.total_seconds / 3600, 2),
+            "work_count": self.work_count,
+            "amount": str(self.amount)
+        }
+
+
+# ----------------------------
+# REPORT ROLLUPS
+# ----------------------------
+class CaseWorkRollup(db.Model):
+    """
+    Worked time summed per case, user and billed flag. Maintained
+    incrementally by the CaseWork events in rollups.py, so the reports
+    don't have to aggregate the whole case_work table.
+    """
+    __tablename__ = 'case_work_rollups'
+
+    case_id = db.Column(db.Integer, db.ForeignKey('cases.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    billed = db.Column(db.Boolean, primary_key=True)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+    work_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_case_work_rollups_user_id", "user_id"),
+    )
+
+    def __repr__(self):
+        return f'<CaseWorkRollup case {self.case_id} user {self.user_id} billed {self.billed}>'
 
 
 # ----------------------------
@@ -197,6 +313,10 @@ class Client(db.Model):
     tax_number = db.Column(db.String(20), nullable=True)
     client_type = db.Column(db.String(20), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_clients_name", "name"),  # client typeahead
+    )
+
     # Polymorphic config
     __mapper_args__ = {
         "polymorphic_on": client_type,
@@ -0,0 +1,118 @@
+import itertools
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import select
+
+import pdf_export
+from db import db
+from models import Case, CaseWork, User
+
+# --------------------
+# Selection
+# --------------------
+
+def select_statements(client_id=None, case_type_id=None, active_only=True, date_from=None, date_to=None):
+    """
+    Loads the unbilled work of every selected case in one query and
+    groups it by case. Returns [(StatementCase, [StatementWork, ...]), ...]
+    ordered by case number.
+    """
+    stmt = (
+        select(
+            Case.number,
+            Case.name,
+            CaseWork.date,
+            CaseWork.start_time,
+            CaseWork.end_time,
+            CaseWork.duration_seconds,
+            User.username,
+            CaseWork.description
+        )
+        .join(Case, CaseWork.case_id == Case.id)
+        .outerjoin(User, CaseWork.user_id == User.id)
+        .where(CaseWork.billed == False)
+        .order_by(Case.number, CaseWork.date, CaseWork.start_time, CaseWork.id)
+    )
+    if client_id:
+        stmt = stmt.where(Case.client_id == client_id)
+    if case_type_id:
+        stmt = stmt.where(Case.case_type_id == case_type_id)
+    if active_only:
+        stmt = stmt.where(Case.is_active == True)
+    if date_from:
+        stmt = stmt.where(CaseWork.date >= date_from)
+    if date_to:
+        stmt = stmt.where(CaseWork.date <= date_to)
+
+    statements = []
+    rows = db.session.execute(stmt)
+    for (number, name), group in itertools.groupby(rows, key=lambda row: (row.number, row.name)):
+        works = [pdf_export.StatementWork(*row[2:]) for row in group]
+        statements.append((pdf_export.StatementCase(number, name), works))
+    return statements
+
+# --------------------
+# Rendering
+# --------------------
+
+def render_batch(statements, output_path, max_workers=None, progress=None):
+    """
+    Renders the statements across a process pool into one zip at
+    output_path, one PDF per case. The zip is written next to its final
+    name and moved in place only when complete.
+
+    progress(done, total) is called after every finished case and may
+    raise to abort the batch. Returns the per-case timings as
+    [{"case_number", "rows", "seconds"}, ...] in case number order.
+    """
+    rows_by_case = {case.number: len(works) for case, works in statements}
+    timings = []
+    part_path = output_path + ".part"
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [
+            executor.submit(pdf_export.render_statement, case, works)
+            for case, works in statements
+        ]
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for done, future in enumerate(as_completed(futures), start=1):
+                number, data, seconds = future.result()
+                archive.writestr(f"case_{number}_report.pdf", data)
+                timings.append({
+                    "case_number": number,
+                    "rows": rows_by_case[number],
+                    "seconds": round(seconds, 3),
+                })
+                if progress:
+                    progress(done, len(futures))
+        os.replace(part_path, output_path)
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    executor.shutdown()
+
+    return sorted(timings, key=lambda timing: timing["case_number"])
+
+
+def export_batch(output_path, filters, max_workers=None, progress=None):
+    """
+    Selects the statements by filters (see select_statements) and renders
+    them into output_path. Needs an app context.
+    """
+    started = time.perf_counter()
+    statements = select_statements(**filters)
+    if not statements:
+        raise ValueError("Nincs számlázatlan munka a kiválasztott ügyekhez.")
+
+    timings = render_batch(statements, output_path, max_workers=max_workers, progress=progress)
+    return {
+        "path": output_path,
+        "cases": timings,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
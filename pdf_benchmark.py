@@ -0,0 +1,65 @@
+"""
+Render time of the case statement PDF on the default and the fast path.
+
+    python pdf_benchmark.py [--rows 100 1000 10000] [--repeat 3]
+
+Uses generated rows, no database is needed.
+"""
+import argparse
+import random
+import time
+from datetime import date, time as dtime, timedelta
+
+import pdf_export
+
+DESCRIPTIONS = [
+    None,
+    "Egyeztetés",
+    "Szerződéstervezet átnézése és észrevételek megküldése az ügyfélnek",
+    "Tárgyalás előkészítése, iratok áttekintése, beadvány megszövegezése és "
+    "egyeztetés az ellenérdekű fél jogi képviselőjével a határidőkről",
+]
+
+def generate_works(count, seed=1):
+    rng = random.Random(seed)
+    works = []
+    for i in range(count):
+        start_hour = rng.randint(8, 16)
+        minutes = rng.choice((15, 30, 60, 90, 120))
+        works.append(pdf_export.StatementWork(
+            date(2025, 1, 1) + timedelta(days=i // 8),
+            dtime(start_hour),
+            dtime(start_hour + minutes // 60, minutes % 60),
+            minutes * 60,
+            rng.choice(("kovacs.odon", "szabo.reka", "nagy.gyorgyi")),
+            rng.choice(DESCRIPTIONS)
+        ))
+    return works
+
+def measure(case, works, fast, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(pdf_export.build_case_pdf(case, works, fast=fast).getvalue())
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return best, size
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Case statement PDF render benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, the best one counts")
+    args = parser.parse_args()
+
+    case = pdf_export.StatementCase("00001", "Kovács Ödön - Ingatlan adásvétel")
+
+    # font registration and styles are one-off costs, keep them out of the numbers
+    pdf_export.build_case_pdf(case, generate_works(1))
+
+    print(f"{'rows':>8}  {'default (s)':>12}  {'fast (s)':>10}  {'speedup':>8}  {'size (KB)':>10}")
+    for rows in args.rows:
+        works = generate_works(rows)
+        default_seconds, _ = measure(case, works, False, args.repeat)
+        fast_seconds, size = measure(case, works, True, args.repeat)
+        print(f"{rows:>8}  {default_seconds:>12.2f}  {fast_seconds:>10.2f}  "
+              f"{default_seconds / fast_seconds:>7.1f}x  {size / 1024:>10.0f}")
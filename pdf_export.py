@@ -0,0 +1,284 @@
+# This module pulls in the whole reportlab stack, import it only where a
+# PDF is actually built.
+import time
+from collections import namedtuple
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib import pagesizes
+from reportlab.lib.units import inch
+
+# Plain, picklable rows the statement is built from, so it can be rendered
+# in another process without the database or the ORM
+StatementCase = namedtuple("StatementCase", "number name")
+StatementWork = namedtuple(
+    "StatementWork",
+    "date start_time end_time duration_seconds username description"
+)
+
+def statement_rows(case, works):
+    """
+    Turns a Case and its CaseWork entries into the plain statement rows.
+    """
+    return StatementCase(case.number, case.name), [
+        StatementWork(
+            w.date,
+            w.start_time,
+            w.end_time,
+            w.duration_seconds,
+            w.user.username if w.user else None,
+            w.description
+        )
+        for w in works
+    ]
+
+# Bundled Unicode font, embedded once per document instead of replacing
+# the characters the standard PDF fonts can't show (ő -> o)
+FONT_PATH = "static/fonts/DejaVuSans.ttf"
+FONT_NAME = "DejaVuSans"
+BOLD_FONT_PATH = "static/fonts/DejaVuSans-Bold.ttf"
+BOLD_FONT_NAME = "DejaVuSans-Bold"
+
+# Statements with at least this many rows use the fast rendering path
+FAST_RENDER_MIN_ROWS = 200
+
+# Rows per table on the fast path, so ReportLab lays out many small tables
+# instead of re-measuring one huge table at every page break
+TABLE_CHUNK_ROWS = 500
+
+COLUMN_WIDTHS = [60, 95, 45, 45, 60, 225]
+
+# Columns with free text (user, description). Their cells become
+# Paragraphs only if the text is wider than the column.
+WRAP_COLUMNS = (1, 5)
+
+# Left + right cell padding of the table style
+CELL_PADDING = 12
+
+HEADER = ["Dátum", "Felhasználó", "Kezdet", "Vége", "Időtartam (h)", "Leírás"]
+
+_font_name = None
+
+def get_font_name():
+    """
+    Registers the bundled fonts with ReportLab on first use (once per
+    process) and returns the regular face's name. Falls back to Helvetica
+    if the font file is missing.
+    """
+    global _font_name
+    if _font_name is None:
+        from db import get_resource_path  # only for the path, no database needed
+
+        path = get_resource_path(FONT_PATH)
+        if path.exists():
+            pdfmetrics.registerFont(TTFont(FONT_NAME, str(path)))
+            bold_name = FONT_NAME
+            bold_path = get_resource_path(BOLD_FONT_PATH)
+            if bold_path.exists():
+                pdfmetrics.registerFont(TTFont(BOLD_FONT_NAME, str(bold_path)))
+                bold_name = BOLD_FONT_NAME
+            else:
+                print(f"{BOLD_FONT_PATH} not found, <b> text uses the regular face.")
+            # no italic file is bundled, <i> falls back to the upright faces
+            pdfmetrics.registerFontFamily(FONT_NAME, normal=FONT_NAME, bold=bold_name,
+                                          italic=FONT_NAME, boldItalic=bold_name)
+            _font_name = FONT_NAME
+        else:
+            print(f"{FONT_PATH} not found, PDFs fall back to Helvetica.")
+            _font_name = "Helvetica"
+    return _font_name
+
+def clean_text(text):
+    if not text:
+        return "-"
+    if not isinstance(text, str):
+        return text
+    if get_font_name() != FONT_NAME:
+        # the standard fonts' encoding has no ő/ű
+        return text.replace("ő", "o").replace("Ő", "O").replace("ű", "u").replace("Ű", "U")
+    return text
+
+def paragraph_text(text):
+    return escape(clean_text(text))
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """
+    Paragraph and table styles, built once per process and shared by
+    every statement.
+    """
+    font_name = get_font_name()
+    sample = getSampleStyleSheet()
+    return {
+        # Define a style for wrapping text in the table
+        "cell": ParagraphStyle(
+            name="TableCell",
+            fontName=font_name,
+            fontSize=8,
+            leading=10,            # line height
+            alignment=TA_LEFT
+        ),
+        "title": ParagraphStyle(name="StatementTitle", parent=sample["Heading1"], fontName=font_name),
+        "total": ParagraphStyle(name="StatementTotal", parent=sample["Heading2"], fontName=font_name),
+        "table": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#2c3e50")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+
+            ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+
+            ("FONTNAME", (0, 0), (-1, -1), font_name),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [
+                colors.whitesmoke,
+                colors.transparent
+            ])
+        ]),
+    }
+
+def row_values(w):
+    return [
+        w.date.strftime("%Y-%m-%d"),
+        w.username,
+        w.start_time.strftime("%H:%M"),
+        w.end_time.strftime("%H:%M"),
+        f"{round(w.duration_seconds / 3600, 2)}",
+        w.description,
+    ]
+
+def build_rows(works, report):
+    """
+    Every cell as a Paragraph, in one table. Fine for short statements.
+    """
+    cell_style = get_styles()["cell"]
+    rows = []
+    for i, w in enumerate(works):
+        if i % 100 == 0:
+            report(i)
+        rows.append([Paragraph(paragraph_text(value), cell_style) for value in row_values(w)])
+    return [rows]
+
+def build_rows_fast(works, report):
+    """
+    Plain strings for the fixed-width cells and Paragraphs only for text
+    that has to wrap, in chunks of TABLE_CHUNK_ROWS rows.
+    """
+    cell_style = get_styles()["cell"]
+    font_name = get_font_name()
+    chunks, rows = [], []
+    for i, w in enumerate(works):
+        if i % 100 == 0:
+            report(i)
+        row = row_values(w)
+        for column in WRAP_COLUMNS:
+            text = clean_text(row[column])
+            if pdfmetrics.stringWidth(text, font_name, cell_style.fontSize) > COLUMN_WIDTHS[column] - CELL_PADDING:
+                row[column] = Paragraph(escape(text), cell_style)
+            else:
+                row[column] = text
+        rows.append(row)
+        if len(rows) == TABLE_CHUNK_ROWS:
+            chunks.append(rows)
+            rows = []
+    if rows or not chunks:
+        chunks.append(rows)
+    return chunks
+
+# Rough table rows per A4 page, only used for progress reporting
+ROWS_PER_PAGE = 40
+
+def build_case_pdf(case, works, progress=None, fast=None):
+    """
+    Builds the summary PDF of a case and its work entries, given as the
+    StatementCase and StatementWork rows of statement_rows().
+    Returns a BytesIO positioned at the start of the document.
+
+    fast picks the rendering path, by default the fast one from
+    FAST_RENDER_MIN_ROWS rows. progress(done, total) is called while the
+    rows are prepared and for every rendered page, if given. It may raise
+    to abort the build.
+    """
+    total_rows = len(works)
+    if fast is None:
+        fast = total_rows >= FAST_RENDER_MIN_ROWS
+
+    def report(done):
+        if progress:
+            progress(done, 2 * total_rows)
+
+    def on_page(canvas, doc):
+        report(total_rows + min(doc.page * ROWS_PER_PAGE, total_rows))
+
+    # ---- PDF Setup ----
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=pagesizes.A4,
+        rightMargin=20,
+        leftMargin=20,
+        topMargin=20,
+        bottomMargin=20
+    )
+
+    styles = get_styles()
+    elements = []
+
+    # ---- Title ----
+    elements.append(
+        Paragraph(
+            f"<b>Ügy összefoglaló</b><br/>{case.number} - {paragraph_text(case.name)}",
+            styles["title"]
+        )
+    )
+    elements.append(Spacer(1, 0.4 * inch))
+
+    # ---- Table Rows ----
+    chunks = (build_rows_fast if fast else build_rows)(works, report)
+    total_hours = round(sum(w.duration_seconds for w in works) / 3600, 2)
+
+    # ---- Create Tables ----
+    # LongTable only measures the rows that fit on the current page when
+    # splitting, a plain Table measures all the remaining ones
+    table_class = LongTable if fast else Table
+    for rows in chunks:
+        table = table_class(
+            [HEADER] + rows,
+            repeatRows=1,
+            colWidths=COLUMN_WIDTHS,
+            splitByRow=1  # allows row to break over pages
+        )
+        table.setStyle(styles["table"])
+        elements.append(table)
+
+    elements.append(Spacer(1, 0.4 * inch))
+
+    # ---- Total Summary ----
+    elements.append(
+        Paragraph(
+            f"<b>Összesített óraszám:</b> {total_hours} h",
+            styles["total"]
+        )
+    )
+
+    # Build PDF
+    doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)
+    buffer.seek(0)
+    return buffer
+
+def render_statement(case, works):
+    """
+    Process pool entry point of the batch export: renders one statement
+    and returns (case number, PDF bytes, seconds it took).
+    """
+    started = time.perf_counter()
+    data = build_case_pdf(case, works).getvalue()
+    return case.number, data, time.perf_counter() - started
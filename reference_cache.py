@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import select
+
+import cache
+from db import db
+from models import CaseType, OutsourceCompany, User
+
+# Seconds a snapshot is used at most. Commits in this process invalidate
+# it right away, the TTL only bounds how long changes made by other
+# processes on a shared database stay unseen.
+DEFAULT_TTL = 60
+
+Snapshot = namedtuple("Snapshot", "rows by_id by_name loaded_at")
+
+
+class ReferenceCache:
+    """
+    Process-local snapshot of a small, rarely changing table: every row as
+    an immutable namedtuple, an id -> row and a name -> id mapping. Loaded
+    with one query on first use and dropped when a commit changes the
+    model.
+    """
+
+    def __init__(self, name, model, name_column, order_by=None, ttl=DEFAULT_TTL):
+        self.name = name
+        self.model = model
+        self.name_column = name_column
+        self.order_by = order_by if order_by is not None else model.__table__.primary_key.columns
+        self.ttl = ttl
+        self.row_type = namedtuple(f"{model.__name__}Row", [c.key for c in model.__table__.columns])
+        self._snapshot = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        cache.register(self)
+        cache.invalidate_on_commit(self, model)
+
+    def _has_uncommitted_changes(self):
+        return self in db.session.info.get("changed_caches", ())
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        fresh = snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+        # a session with flushed but uncommitted changes to the table reads
+        # its own version of it
+        if fresh and not self._has_uncommitted_changes():
+            self.hits += 1
+            return snapshot
+
+        generation = self._generation
+        snapshot = self._load()
+        # Only committed rows go into the shared snapshot, and none read
+        # before a concurrent invalidation.
+        with self._lock:
+            self.loads += 1
+            if not self._has_uncommitted_changes() and generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _load(self):
+        table = self.model.__table__
+        rows = tuple(
+            self.row_type(*row)
+            for row in db.session.execute(select(*table.columns).order_by(*self.order_by))
+        )
+        by_name = {}
+        for row in rows:
+            by_name.setdefault(getattr(row, self.name_column), row.id)
+        return Snapshot(
+            rows,
+            MappingProxyType({row.id: row for row in rows}),
+            MappingProxyType(by_name),
+            time.monotonic()
+        )
+
+    def all(self):
+        return self.snapshot().rows
+
+    def get(self, row_id):
+        return self.snapshot().by_id.get(row_id)
+
+    def get_by_name(self, name):
+        snapshot = self.snapshot()
+        row_id = snapshot.by_name.get(name)
+        return snapshot.by_id.get(row_id) if row_id is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "size": len(snapshot.rows) if snapshot else 0,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "age": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+        }
+
+
+users = ReferenceCache("users", User, "username")
+case_types = ReferenceCache("case_types", CaseType, "name", order_by=[CaseType.name])
+outsource_companies = ReferenceCache(
+    "outsource_companies", OutsourceCompany, "name", order_by=[OutsourceCompany.name]
+)
@@ -0,0 +1,189 @@
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, sqlite
+
+import cache
+from db import db, get_metadata, set_metadata
+
+# --------------------
+# Reading
+# --------------------
+
+def read_records(path, json_key=None):
+    """
+    Reads records from a .json or .csv file. JSON may hold a list or an
+    object with the list under json_key. Plain strings become {"name": ...}.
+    """
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return [
+                {key: (value.strip() or None) if isinstance(value, str) else value
+                 for key, value in row.items()}
+                for row in csv.DictReader(f)
+            ]
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get(json_key, []) if json_key else next(iter(data.values()), [])
+    return [{"name": item} if isinstance(item, str) else item for item in data]
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# --------------------
+# Loading
+# --------------------
+
+def insert_ignore(model, key):
+    """
+    INSERT statement for model (a class or table) which skips rows
+    violating a unique constraint, in the current database's dialect.
+    Other errors still fail. On MySQL the duplicate's key column is set
+    to itself: INSERT IGNORE would also turn e.g. a NULL in a NOT NULL
+    column or a too long value into a warning.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(model)
+        return statement.on_duplicate_key_update({key: statement.table.c[key]})
+    return insert(model)
+
+
+def bulk_insert_missing(model, records, key):
+    """
+    Inserts the records whose key column value isn't in the table yet.
+    Existing keys are read in one query and the missing rows are inserted
+    in one executemany, in one transaction. Returns the number of rows
+    actually inserted: rows another process added in between are skipped
+    by the INSERT, and only counted on MySQL (whose driver reports matched
+    rather than changed rows).
+    """
+    key_column = getattr(model, key)
+    existing = {value for (value,) in db.session.query(key_column)}
+
+    missing, seen = [], set()
+    for record in records:
+        value = record.get(key)
+        if value is None or value in existing or value in seen:
+            continue
+        seen.add(value)
+        missing.append(record)
+
+    inserted = 0
+    if missing:
+        try:
+            # Core insert on the table: an ORM bulk insert has no rowcount
+            inserted = db.session.execute(insert_ignore(model.__table__, key), missing).rowcount
+            cache.mark_changed(db.session, model)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return inserted
+
+
+def load_if_changed(name, path, loader):
+    """
+    Runs loader(path) only if the file changed since it was last loaded,
+    going by a content hash kept in app_metadata. Returns the loader's
+    result, or None if it was skipped.
+    """
+    digest = file_hash(path)
+    metadata_key = f"seed_hash:{name}"
+    if get_metadata(metadata_key) == digest:
+        return None
+
+    result = loader(path)
+    set_metadata(metadata_key, digest)
+    return result
+
+# --------------------
+# Reference tables
+# --------------------
+
+def import_case_types(path):
+    from models import CaseType
+
+    records = [
+        {"name": record["name"], "active": record.get("active", True) not in (False, "0", "false")}
+        for record in read_records(path, json_key="DEFAULT_CASE_TYPES")
+    ]
+    return bulk_insert_missing(CaseType, records, key="name")
+
+
+def import_users(path):
+    """
+    Columns/keys: username, first_name, last_name. Existing usernames are
+    skipped.
+    """
+    from models import User
+
+    records = [
+        {
+            "username": record.get("username"),
+            "first_name": record.get("first_name"),
+            "last_name": record.get("last_name"),
+        }
+        for record in read_records(path)
+    ]
+    return bulk_insert_missing(User, records, key="username")
+
+
+def import_clients(path):
+    """
+    Columns/keys: client_type (PERSON or COMPANY), name, tax_number,
+    birth_date (YYYY-MM-DD), address, headquarters. Clients with the same
+    name and tax number as an existing one are skipped.
+    """
+    from models import Client, ClientCompany, ClientPerson
+
+    existing = set(db.session.query(Client.name, Client.tax_number))
+
+    clients = []
+    for record in read_records(path):
+        key = (record.get("name"), record.get("tax_number"))
+        if not key[0] or key in existing:
+            continue
+        existing.add(key)
+
+        if (record.get("client_type") or "").upper() == "PERSON":
+            birth_date = record.get("birth_date")
+            clients.append(ClientPerson(
+                name=key[0],
+                tax_number=key[1],
+                birth_date=datetime.strptime(birth_date, "%Y-%m-%d").date() if birth_date else None,
+                address=record.get("address")
+            ))
+        else:
+            clients.append(ClientCompany(
+                name=key[0],
+                tax_number=key[1],
+                headquarters=record.get("headquarters")
+            ))
+
+    # clients span two tables (joined inheritance), so they go through the
+    # ORM, still in a single transaction
+    try:
+        db.session.add_all(clients)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(clients)
+
+
+IMPORTERS = {
+    "case-types": import_case_types,
+    "users": import_users,
+    "clients": import_clients,
+}
@@ -0,0 +1,157 @@
+from sqlalchemy import event, func, inspect, select
+
+from db import db
+from models import CaseWork, CaseWorkRollup
+
+rollups = CaseWorkRollup.__table__
+
+# --------------------
+# Incremental maintenance
+# --------------------
+
+def apply_delta(connection, case_id, user_id, billed, seconds, count):
+    """
+    Adds seconds/count to one rollup row, creating it if needed and
+    removing it once no work is left in it.
+    """
+    key = (
+        (rollups.c.case_id == case_id)
+        & (rollups.c.user_id == user_id)
+        & (rollups.c.billed == billed)
+    )
+    result = connection.execute(
+        rollups.update()
+        .where(key)
+        .values(
+            total_seconds=rollups.c.total_seconds + seconds,
+            work_count=rollups.c.work_count + count
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            rollups.insert().values(
+                case_id=case_id,
+                user_id=user_id,
+                billed=billed,
+                total_seconds=seconds,
+                work_count=count
+            )
+        )
+    elif count < 0:
+        connection.execute(rollups.delete().where(key & (rollups.c.work_count <= 0)))
+
+
+def _previous_value(state, attr_name):
+    history = state.attrs[attr_name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attr_name)
+
+
+@event.listens_for(CaseWork, "after_insert")
+def add_to_rollup(mapper, connection, target):
+    apply_delta(connection, target.case_id, target.user_id, bool(target.billed),
+                target.duration_seconds, 1)
+
+
+@event.listens_for(CaseWork, "after_update")
+def move_in_rollup(mapper, connection, target):
+    state = inspect(target)
+    old = {name: _previous_value(state, name)
+           for name in ("case_id", "user_id", "billed", "duration_seconds")}
+    new = {name: getattr(target, name)
+           for name in ("case_id", "user_id", "billed", "duration_seconds")}
+    if old == new:
+        return
+
+    apply_delta(connection, old["case_id"], old["user_id"], bool(old["billed"]),
+                -old["duration_seconds"], -1)
+    apply_delta(connection, new["case_id"], new["user_id"], bool(new["billed"]),
+                new["duration_seconds"], 1)
+
+
+@event.listens_for(CaseWork, "after_delete")
+def remove_from_rollup(mapper, connection, target):
+    state = inspect(target)
+    apply_delta(connection,
+                _previous_value(state, "case_id"),
+                _previous_value(state, "user_id"),
+                bool(_previous_value(state, "billed")),
+                -_previous_value(state, "duration_seconds"), -1)
+
+# --------------------
+# Rebuild and verification
+# --------------------
+
+def _aggregate_from_case_work():
+    return (
+        select(
+            CaseWork.case_id,
+            CaseWork.user_id,
+            CaseWork.billed,
+            func.sum(CaseWork.duration_seconds).label("total_seconds"),
+            func.count().label("work_count")
+        )
+        .group_by(CaseWork.case_id, CaseWork.user_id, CaseWork.billed)
+    )
+
+
+def verify_rollups():
+    """
+    Compares the rollup table with a fresh aggregate of case_work.
+    Returns the list of mismatching (case_id, user_id, billed) keys.
+    """
+    expected = {
+        (row.case_id, row.user_id, bool(row.billed)): (row.total_seconds, row.work_count)
+        for row in db.session.execute(_aggregate_from_case_work())
+    }
+    actual = {
+        (row.case_id, row.user_id, bool(row.billed)): (row.total_seconds, row.work_count)
+        for row in db.session.execute(select(rollups))
+    }
+    keys = set(expected) | set(actual)
+    return sorted(key for key in keys if expected.get(key) != actual.get(key))
+
+
+def refresh_rollups(connection, case_ids):
+    """
+    Recomputes the rollup rows of the given cases (ids or a select of
+    ids), after set-based statements the CaseWork events don't see.
+    """
+    connection.execute(rollups.delete().where(rollups.c.case_id.in_(case_ids)))
+    connection.execute(
+        rollups.insert().from_select(
+            ["case_id", "user_id", "billed", "total_seconds", "work_count"],
+            _aggregate_from_case_work().where(CaseWork.case_id.in_(case_ids))
+        )
+    )
+
+
+def rebuild_rollups():
+    """
+    Recomputes the rollup table from scratch in one transaction.
+    """
+    try:
+        db.session.execute(rollups.delete())
+        db.session.execute(
+            rollups.insert().from_select(
+                ["case_id", "user_id", "billed", "total_seconds", "work_count"],
+                _aggregate_from_case_work()
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def ensure_rollups():
+    """
+    Builds the rollups on databases that have work entries but no rollups
+    yet, e.g. right after upgrading to a version which has them.
+    """
+    has_rollups = db.session.query(select(rollups).exists()).scalar()
+    has_work = db.session.query(CaseWork.query.exists()).scalar()
+    if has_work and not has_rollups:
+        rebuild_rollups()
+        print("Report rollups built.")
@@ -0,0 +1,398 @@
+import html
+import re
+import weakref
+from contextlib import contextmanager
+
+from sqlalchemy import Integer, and_, or_, text
+from sqlalchemy.orm import joinedload
+
+from db import db, is_sqlite
+
+# The FTS5 index has one document per case, client and described work
+# entry. Its rowid is derived from the row's id (id * 4 + kind code), so
+# the triggers can find a document without a lookup.
+KINDS = {"case": 1, "client": 2, "work": 3}
+
+# unicode61 with remove_diacritics 2 folds á -> a, ő -> o, ű -> u both in
+# the index and in queries. The prefix indexes make short prefix queries
+# as fast as whole words.
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    kind UNINDEXED,
+    ref_id UNINDEXED,
+    title,
+    detail,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# Paused by bulk_work_insert during the work import, which indexes a whole
+# batch with INDEX_NEW_WORK instead
+WORK_INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS search_case_work_ai AFTER INSERT ON case_work
+    WHEN new.description IS NOT NULL BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, body)
+        VALUES (new.id * 4 + 3, 'work', new.id, new.description);
+    END
+"""
+
+INDEX_NEW_WORK = """
+    INSERT INTO search_index(rowid, kind, ref_id, body)
+    SELECT id * 4 + 3, 'work', id, description FROM case_work
+    WHERE id > :last_id AND description IS NOT NULL
+"""
+
+# Keeps the index in sync with every write, the ORM's and Core bulk
+# statements (e.g. the work import) alike.
+TRIGGERS = [
+    # ---- cases: title = name, detail = number, body = description ----
+    """
+    CREATE TRIGGER IF NOT EXISTS search_cases_ai AFTER INSERT ON cases BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, title, detail, body)
+        VALUES (new.id * 4 + 1, 'case', new.id, new.name, new.number, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_cases_au AFTER UPDATE OF name, number, description ON cases BEGIN
+        UPDATE search_index SET title = new.name, detail = new.number, body = new.description
+        WHERE rowid = new.id * 4 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_cases_ad AFTER DELETE ON cases BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    # ---- clients: title = name, detail = tax number, body = address/headquarters ----
+    """
+    CREATE TRIGGER IF NOT EXISTS search_clients_ai AFTER INSERT ON clients BEGIN
+        INSERT INTO search_index(rowid, kind, ref_id, title, detail, body)
+        VALUES (new.id * 4 + 2, 'client', new.id, new.name, new.tax_number, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_clients_au AFTER UPDATE OF name, tax_number ON clients BEGIN
+        UPDATE search_index SET title = new.name, detail = new.tax_number
+        WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_clients_ad AFTER DELETE ON clients BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_client_persons_ai AFTER INSERT ON client_persons BEGIN
+        UPDATE search_index SET body = new.address WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_client_persons_au AFTER UPDATE OF address ON client_persons BEGIN
+        UPDATE search_index SET body = new.address WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_client_companies_ai AFTER INSERT ON client_companies BEGIN
+        UPDATE search_index SET body = new.headquarters WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_client_companies_au AFTER UPDATE OF headquarters ON client_companies BEGIN
+        UPDATE search_index SET body = new.headquarters WHERE rowid = new.id * 4 + 2;
+    END
+    """,
+    # ---- work entries with a description: body = description ----
+    WORK_INSERT_TRIGGER,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_case_work_au AFTER UPDATE OF description ON case_work BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO search_index(rowid, kind, ref_id, body)
+        SELECT new.id * 4 + 3, 'work', new.id, new.description WHERE new.description IS NOT NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_case_work_ad AFTER DELETE ON case_work BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+]
+
+REBUILD = [
+    "DELETE FROM search_index",
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, title, detail, body)
+    SELECT id * 4 + 1, 'case', id, name, number, description FROM cases
+    """,
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, title, detail, body)
+    SELECT c.id * 4 + 2, 'client', c.id, c.name, c.tax_number, COALESCE(p.address, co.headquarters)
+    FROM clients c
+    LEFT JOIN client_persons p ON p.id = c.id
+    LEFT JOIN client_companies co ON co.id = c.id
+    """,
+    """
+    INSERT INTO search_index(rowid, kind, ref_id, body)
+    SELECT id * 4 + 3, 'work', id, description FROM case_work WHERE description IS NOT NULL
+    """,
+]
+
+# Private use characters as highlight markers, replaced by <mark> after
+# the text is HTML escaped
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+# engine -> whether it has the index, see has_search_index
+_index_present = weakref.WeakKeyDictionary()
+
+# --------------------
+# Index maintenance
+# --------------------
+
+def fts5_available():
+    with db.engine.connect() as conn:
+        options = {row[0] for row in conn.exec_driver_sql("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def _search_index_exists(engine):
+    if not is_sqlite(engine):
+        return False
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).first() is not None
+
+
+def has_search_index():
+    """
+    Whether the database has the FTS5 index. Looked up once per engine,
+    ensure_search_index records it when it creates the index.
+    """
+    engine = db.engine
+    present = _index_present.get(engine)
+    if present is None:
+        present = _index_present[engine] = _search_index_exists(engine)
+    return present
+
+
+@contextmanager
+def bulk_work_insert(connection):
+    """
+    Wraps a bulk insert of case work entries on connection: instead of the
+    per-row trigger, the new rows are indexed with one INSERT ... SELECT at
+    the end. The trigger is dropped and recreated in the caller's
+    transaction, which SQLite keeps to itself: other connections never see
+    it missing, and can't insert in between.
+    """
+    if not has_search_index():
+        yield
+        return
+
+    # pysqlite opens transactions before DML only, not before DDL
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+    connection.exec_driver_sql("DROP TRIGGER IF EXISTS search_case_work_ai")
+    last_id = connection.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM case_work").scalar()
+    yield
+    connection.execute(text(INDEX_NEW_WORK), {"last_id": last_id})
+    connection.exec_driver_sql(WORK_INSERT_TRIGGER)
+
+
+def rebuild_search_index():
+    with db.engine.begin() as conn:
+        for statement in REBUILD:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO search_index(search_index) VALUES ('optimize')")
+
+
+def ensure_search_index():
+    """
+    Creates the FTS5 index and its triggers on SQLite, filling it from the
+    existing rows if it's new. Other databases use the LIKE fallback in
+    search().
+    """
+    if not is_sqlite(db.engine):
+        return
+    if not fts5_available():
+        print("SQLite is built without FTS5, search falls back to LIKE queries.")
+        return
+
+    existed = _search_index_exists(db.engine)
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(CREATE_INDEX)
+        for trigger in TRIGGERS:
+            conn.exec_driver_sql(trigger)
+    _index_present[db.engine] = True
+    if not existed:
+        rebuild_search_index()
+        print("Search index built.")
+
+# --------------------
+# Querying
+# --------------------
+
+def to_match_query(q):
+    """
+    Turns free text into an FTS5 query: every word must match as a
+    prefix. Words are quoted, so FTS5 operators in the input are plain text.
+    """
+    words = re.findall(r"\w+", q)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _highlight(value):
+    if value is None:
+        return None
+    return (
+        html.escape(value)
+        .replace(_MARK_START, "<mark>")
+        .replace(_MARK_END, "</mark>")
+    )
+
+
+def search(q, kind=None, limit=20, offset=0):
+    """
+    Searches cases, clients and work descriptions. Returns a list of
+    dicts (kind, id, title, detail, snippet, case_number, date), best
+    match first. Every text is HTML escaped, the matches are wrapped in
+    <mark> in title/detail/snippet.
+    """
+    match = to_match_query(q)
+    if not match:
+        return []
+    if not has_search_index():
+        return _search_like(q, kind, limit, offset)
+
+    sql = f"""
+        SELECT
+            s.kind,
+            s.ref_id,
+            highlight(search_index, 2, '{_MARK_START}', '{_MARK_END}') AS title,
+            highlight(search_index, 3, '{_MARK_START}', '{_MARK_END}') AS detail,
+            snippet(search_index, 4, '{_MARK_START}', '{_MARK_END}', '…', 16) AS snippet,
+            cw.date AS work_date,
+            COALESCE(wc.number, '') AS work_case_number
+        FROM search_index s
+        LEFT JOIN case_work cw ON s.kind = 'work' AND cw.id = s.ref_id
+        LEFT JOIN cases wc ON wc.id = cw.case_id
+        WHERE search_index MATCH :match {"AND s.kind = :kind" if kind else ""}
+        ORDER BY bm25(search_index, 0, 0, 10.0, 5.0, 1.0)
+        LIMIT :limit OFFSET :offset
+    """
+    params = {"match": match, "limit": limit, "offset": offset}
+    if kind:
+        params["kind"] = kind
+
+    return [
+        {
+            "kind": row.kind,
+            "id": row.ref_id,
+            "title": _highlight(row.title),
+            "detail": _highlight(row.detail),
+            "snippet": _highlight(row.snippet),
+            "case_number": html.escape(row.work_case_number) if row.work_case_number else None,
+            "date": html.escape(str(row.work_date)) if row.work_date else None,
+        }
+        for row in db.session.execute(text(sql), params)
+    ]
+
+
+def _search_like(q, kind, limit, offset):
+    """
+    Substring search for databases without the FTS5 index (MySQL/MariaDB,
+    whose default collations are accent-insensitive). Unranked, and
+    slower on large tables.
+    """
+    from models import Case, CaseWork, Client
+
+    pattern = f"%{q.strip()}%"
+    results = []
+    if kind in (None, "case"):
+        cases = Case.query.filter(or_(
+            Case.name.ilike(pattern), Case.number.ilike(pattern), Case.description.ilike(pattern)
+        )).order_by(Case.number).limit(limit + offset)
+        results += [
+            {"kind": "case", "id": c.id, "title": html.escape(c.name), "detail": html.escape(c.number),
+             "snippet": html.escape(c.description or ""), "case_number": None, "date": None}
+            for c in cases
+        ]
+    if kind in (None, "client"):
+        clients = Client.query.filter(or_(
+            Client.name.ilike(pattern), Client.tax_number.ilike(pattern)
+        )).order_by(Client.name).limit(limit + offset)
+        results += [
+            {"kind": "client", "id": c.id, "title": html.escape(c.name),
+             "detail": html.escape(c.tax_number or ""), "snippet": None, "case_number": None, "date": None}
+            for c in clients
+        ]
+    if kind in (None, "work"):
+        works = (
+            CaseWork.query.options(joinedload(CaseWork.case))
+            .filter(CaseWork.description.ilike(pattern))
+            .order_by(CaseWork.date.desc()).limit(limit + offset)
+        )
+        results += [
+            {"kind": "work", "id": w.id, "title": None, "detail": None,
+             "snippet": html.escape(w.description), "case_number": html.escape(w.case.number), "date": html.escape(str(w.date))}
+            for w in works
+        ]
+    return results[offset:offset + limit]
+
+
+# --------------------
+# Typeahead lookups
+# --------------------
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_prefix_filter(q, columns):
+    """
+    Every word of q has to start one of the words in one of the columns.
+    Returns None if q has no words.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    conditions = []
+    for word in words:
+        word = _escape_like(word)
+        conditions.append(or_(*(
+            condition
+            for column in columns
+            for condition in (
+                column.ilike(f"{word}%", escape="\\"),
+                column.ilike(f"% {word}%", escape="\\"),
+            )
+        )))
+    return and_(*conditions)
+
+
+def prefix_filter(q, kind, id_column, like_columns, contains_columns=()):
+    """
+    Filter for the typeahead endpoints: the rows of kind ('case' or
+    'client') whose title or detail has a word starting with every word of
+    q. Uses the FTS5 index, or LIKE on like_columns without it. Rows whose
+    contains_columns contain q anywhere match as well, e.g. the case
+    number 00012 for "12". Returns None if q has no words.
+    """
+    match = to_match_query(q)
+    if not match:
+        return None
+    if has_search_index():
+        ids = (
+            text("SELECT ref_id FROM search_index WHERE search_index MATCH :match AND kind = :kind")
+            .bindparams(match=f"{{title detail}} : ({match})", kind=kind)
+            .columns(ref_id=Integer)
+        )
+        condition = id_column.in_(ids)
+    else:
+        condition = like_prefix_filter(q, like_columns)
+
+    if not contains_columns:
+        return condition
+    pattern = f"%{_escape_like(q.strip())}%"
+    return or_(condition, *(column.ilike(pattern, escape="\\") for column in contains_columns))
@@ -0,0 +1,72 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+# Process start, as close as we can get to it
+STARTED = time.perf_counter()
+
+phases = []     # (name, seconds)
+marks = []      # (name, seconds since start)
+imports = []    # (module, cumulative seconds, nesting depth)
+
+_import_depth = 0
+
+
+@contextmanager
+def phase(name):
+    """
+    Records how long the wrapped block took.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, time.perf_counter() - started))
+
+
+def mark(name):
+    """
+    Records the time since process start, e.g. when the window is shown.
+    """
+    marks.append((name, time.perf_counter() - STARTED))
+
+
+def track_imports():
+    """
+    Times every first import of a module from now on, like
+    python -X importtime does.
+    """
+    original_import = builtins.__import__
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        global _import_depth
+        if level or name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+
+        _import_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            _import_depth -= 1
+            imports.append((name, time.perf_counter() - started, _import_depth))
+
+    builtins.__import__ = timed_import
+
+
+def print_report(limit=25):
+    print("Startup phases:")
+    for name, seconds in phases:
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+
+    if marks:
+        print("Since process start:")
+        for name, seconds in marks:
+            print(f"  {seconds * 1000:9.1f} ms  {name}")
+
+    if imports:
+        print(f"Slowest imports (cumulative, top {limit}):")
+        slowest = sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+        for name, seconds, depth in slowest:
+            print(f"  {seconds * 1000:9.1f} ms  {'  ' * depth}{name}")
@@ -0,0 +1,108 @@
+/**
+ * Multi-select for the table views. Rows carry a checkbox with the row id
+ * (.bulk-select), the header one (.bulk-select-all) toggles the visible
+ * rows. Buttons with data-bulk-url post the selection as JSON:
+ *
+ *   <button data-bulk-url="/cases/bulk-update" data-bulk-values='{"is_active": false}'
+ *           data-bulk-confirm="...">
+ *
+ * With data-bulk-filters="#formId" the button acts on every row matching
+ * that filter form instead of the checked ones.
+ */
+document.addEventListener('DOMContentLoaded', () => {
+  const bar = document.querySelector('.bulk-actions');
+  if (!bar) return;
+
+  const countLabel = bar.querySelector('.bulk-count');
+  const alertBox = document.querySelector('.bulk-alert');
+
+  /** @returns {number[]} */
+  function selectedIds() {
+    return Array.from(document.querySelectorAll('.bulk-select:checked')).map((checkbox) =>
+      Number(checkbox.value)
+    );
+  }
+
+  function updateBar() {
+    const count = selectedIds().length;
+    countLabel.textContent = String(count);
+    bar.querySelectorAll('[data-bulk-url]:not([data-bulk-filters])').forEach((button) => {
+      button.disabled = count === 0;
+    });
+  }
+
+  /**
+   * @param {string} message
+   */
+  function showError(message) {
+    alertBox.innerHTML = `
+      <div class="alert alert-danger alert-dismissible fade show" role="alert">
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+      </div>
+    `;
+  }
+
+  // rows can be added later (load more), so listen on the document
+  document.addEventListener('change', (event) => {
+    const target = /** @type {HTMLInputElement} */ (event.target);
+    if (target.classList.contains('bulk-select-all')) {
+      target
+        .closest('table')
+        .querySelectorAll('tbody tr')
+        .forEach((row) => {
+          const checkbox = row.querySelector('.bulk-select');
+          if (checkbox && row.style.display !== 'none') checkbox.checked = target.checked;
+        });
+    }
+    if (target.classList.contains('bulk-select') || target.classList.contains('bulk-select-all')) {
+      updateBar();
+    }
+  });
+
+  bar.querySelectorAll('[data-bulk-url]').forEach((button) => {
+    button.addEventListener('click', async () => {
+      const body = { values: JSON.parse(button.dataset.bulkValues || '{}') };
+      let count;
+
+      if (button.dataset.bulkFilters) {
+        const filters = {};
+        new FormData(document.querySelector(button.dataset.bulkFilters)).forEach((value, key) => {
+          if (value !== '' && key !== 'sort' && key !== 'dir') filters[key] = String(value);
+        });
+        if (!Object.keys(filters).length) {
+          showError('Adj meg legalább egy szűrési feltételt.');
+          return;
+        }
+        body.filters = filters;
+        count = 'minden szűrésnek megfelelő';
+      } else {
+        body.ids = selectedIds();
+        count = body.ids.length;
+      }
+
+      const question = button.dataset.bulkConfirm;
+      if (question && !confirm(`${question} (${count} sor)`)) return;
+
+      button.disabled = true;
+      try {
+        const response = await fetch(button.dataset.bulkUrl, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify(body),
+        });
+        const data = await response.json().catch(() => null);
+        if (!response.ok) {
+          throw new Error(data?.error || 'Hiba történt.');
+        }
+        window.location.reload();
+      } catch (error) {
+        showError(error.message || 'Ismeretlen hiba történt.');
+        button.disabled = false;
+        updateBar();
+      }
+    });
+  });
+
+  updateBar();
+});
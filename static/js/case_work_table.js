@@ -0,0 +1,89 @@
+/**
+ * Server-side paginated case work table.
+ * Sorting and filtering are done by the server, rows are fetched
+ * page by page from /case-work-table/page using keyset cursors.
+ */
+document.addEventListener('DOMContentLoaded', () => {
+  const form = document.getElementById('caseWorkFilters');
+  const tbody = document.getElementById('caseWorkRows');
+  const emptyText = document.getElementById('caseWorkEmpty');
+  const loadMoreBtn = document.getElementById('loadMoreBtn');
+  if (!form || !tbody) return;
+
+  const sortInput = form.querySelector('input[name="sort"]');
+  const dirInput = form.querySelector('input[name="dir"]');
+
+  /**
+   * Builds the query string of the current filters, without empty values.
+   * @param {string} [cursor]
+   * @returns {URLSearchParams}
+   */
+  function currentParams(cursor) {
+    const params = new URLSearchParams();
+    new FormData(form).forEach((value, key) => {
+      if (value !== '') params.set(key, String(value));
+    });
+    if (cursor) params.set('cursor', cursor);
+    return params;
+  }
+
+  /**
+   * Fetches one page of rows. Replaces the table body unless a cursor is
+   * given, in which case the rows are appended.
+   * @param {string} [cursor]
+   */
+  function loadPage(cursor) {
+    const params = currentParams(cursor);
+
+    fetch('/case-work-table/page?' + params.toString())
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      })
+      .then((data) => {
+        if (cursor) {
+          tbody.insertAdjacentHTML('beforeend', data.html);
+        } else {
+          tbody.innerHTML = data.html;
+          history.replaceState(null, '', '?' + currentParams().toString());
+        }
+
+        emptyText.classList.toggle('d-none', tbody.children.length > 0);
+        loadMoreBtn.dataset.cursor = data.next_cursor || '';
+        loadMoreBtn.classList.toggle('d-none', !data.next_cursor);
+      })
+      .catch((error) => console.error('Error while loading case works:', error));
+  }
+
+  document.querySelectorAll('th[data-sort]').forEach((header) => {
+    header.addEventListener('click', () => {
+      const key = header.dataset.sort;
+      if (sortInput.value === key) {
+        dirInput.value = dirInput.value === 'asc' ? 'desc' : 'asc';
+      } else {
+        sortInput.value = key;
+        dirInput.value = 'asc';
+      }
+      loadPage();
+    });
+  });
+
+  let searchTimeout;
+  form.addEventListener('input', (event) => {
+    clearTimeout(searchTimeout);
+    // debounce typing so every keystroke does not hit the server
+    const delay = event.target.type === 'text' ? 300 : 0;
+    searchTimeout = setTimeout(() => loadPage(), delay);
+  });
+
+  form.addEventListener('submit', (event) => {
+    event.preventDefault();
+    loadPage();
+  });
+
+  loadMoreBtn.addEventListener('click', () => {
+    loadPage(loadMoreBtn.dataset.cursor);
+  });
+});
@@ -1,92 +1,170 @@
 /**
- * @typedef {Object} CaseItem
- * @property {number} id - Case identifier
- * @property {string} name - Case name
+ * Typeahead pickers for users, cases and clients. Instead of a <select>
+ * with every row, the page renders only the current choice and the list
+ * is fetched page by page from the lookup endpoints as the user types.
+ *
+ *   <div class="typeahead" data-typeahead="case" data-source="/get-cases">
+ *     <input type="hidden" name="case_id" value="12" />
+ *     <input type="text" class="form-control" value="00012 – Ügy" required />
+ *     <ul class="dropdown-menu w-100"></ul>
+ *   </div>
  */
 
 /**
- * @typedef {Object} User
- * @property {number} id - User identifier
- * @property {string} first_name - User first name
- * @property {string} last_name - User last name
+ * @typedef {Object} LookupItem
+ * @property {number} id - Row identifier
+ * @property {string} [number] - Case number
+ * @property {string} [name] - Case or client name
+ * @property {?string} [tax_number] - Client tax number
+ * @property {string} [username] - User name
  */
 
+/** Rows per request, "Több találat" loads the next page */
+const TYPEAHEAD_PAGE_SIZE = 20;
+const TYPEAHEAD_DELAY_MS = 200;
+
+/** @type {Object<string, function(LookupItem): string>} */
+const TYPEAHEAD_LABELS = {
+  case: (item) => `${item.number} – ${item.name}`,
+  client: (item) => (item.tax_number ? `${item.name} (${item.tax_number})` : item.name),
+  user: (item) => item.username,
+};
+
 document.addEventListener('DOMContentLoaded', () => {
-  /** @type {string|undefined} */
-  var caseResult = populateCaseDropdown();
-  if (!caseResult) {
-    console.log('No case select element found.');
-  } else {
-    console.log(caseResult);
-  }
+  document.querySelectorAll('.typeahead').forEach(initTypeahead);
 });
 
 /**
- * Populate the case select dropdown by fetching case list from server.
- * @returns {string|undefined} Returns a status string, or `undefined` if the select element is not found.
+ * @param {HTMLElement} container
  */
-function populateCaseDropdown() {
-  /** @type {HTMLSelectElement | null} */
-  const caseSelect = /** @type {HTMLSelectElement | null} */ (
-    document.getElementById('case-select')
-  );
-  if (!caseSelect) return;
-  fetch('/get-cases')
-    .then((response) => {
-      /** @type {Response} */
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      return response.json();
-    })
-    .then((data) => {
-      /** @type {CaseItem[]} */
-      console.log('Esetek betöltve:', data);
-      data.forEach((caseItem) => {
-        /** @type {HTMLOptionElement} */
-        const option = document.createElement('option');
-        option.value = String(caseItem.id);
-        option.textContent = caseItem.id + ' - ' + caseItem.name;
-        caseSelect.appendChild(option);
-      });
-      return 'Case dropdown populated successfully.';
-    })
-    .catch((error) => console.error('Error while loading case list:', error));
-  return 'Case dropdown population failed.';
-}
+function initTypeahead(container) {
+  const hidden = /** @type {HTMLInputElement} */ (container.querySelector('input[type="hidden"]'));
+  const input = /** @type {HTMLInputElement} */ (container.querySelector('input[type="text"]'));
+  const menu = /** @type {HTMLUListElement} */ (container.querySelector('.dropdown-menu'));
+  const source = container.dataset.source;
+  const label = TYPEAHEAD_LABELS[container.dataset.typeahead] || ((item) => item.name);
 
-/**
- * Populate the user select dropdown by fetching users from server.
- * @returns {string|undefined} Returns a status string, or `undefined` if the select element is not found.
- */
-function populateUserDropdown() {
-  /** @type {HTMLSelectElement | null} */
-  const userSelect = /** @type {HTMLSelectElement | null} */ (
-    document.getElementById('user-select')
-  );
-  if (!userSelect) return;
-
-  /** @type {Promise<Response>} */
-  const request = fetch('/get-users');
-  request
-    .then((response) => {
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      /** @type {Promise<User[]>} */
-      const user = response.json();
-      return user;
-    })
-    .then((data) => {
-      data.forEach((user) => {
-        /** @type {HTMLOptionElement} */
-        const option = document.createElement('option');
-        option.value = String(user.id);
-        option.textContent = user.first_name + ' ' + user.last_name;
-        userSelect.appendChild(option);
-      });
-      return 'User dropdown populated successfully.';
-    })
-    .catch((error) => console.error('Error while loading user list:', error));
-  return 'User dropdown population failed.';
+  const initial = { id: hidden.value, text: input.value };
+  let timer = null;
+  let query = null;
+  let offset = 0;
+  let active = -1;
+
+  input.autocomplete = 'off';
+  container.classList.add('position-relative');
+
+  function validate() {
+    input.setCustomValidity(input.value && !hidden.value ? 'Válassz a listából!' : '');
+  }
+
+  function close() {
+    menu.classList.remove('show');
+    active = -1;
+  }
+
+  /**
+   * @param {LookupItem} item
+   */
+  function select(item) {
+    hidden.value = String(item.id);
+    input.value = label(item);
+    validate();
+    close();
+  }
+
+  /**
+   * @param {LookupItem[]} items
+   * @param {boolean} append - next page of the same query
+   */
+  function render(items, append) {
+    if (!append) menu.innerHTML = '';
+    menu.querySelector('.typeahead-more')?.remove();
+
+    items.forEach((item) => {
+      const link = document.createElement('button');
+      link.type = 'button';
+      link.className = 'dropdown-item text-wrap';
+      link.textContent = label(item);
+      link.addEventListener('mousedown', (event) => event.preventDefault()); // keep the focus
+      link.addEventListener('click', () => select(item));
+      const li = document.createElement('li');
+      li.appendChild(link);
+      menu.appendChild(li);
+    });
+
+    if (items.length === TYPEAHEAD_PAGE_SIZE) {
+      const more = document.createElement('li');
+      more.className = 'typeahead-more';
+      more.innerHTML = '<button type="button" class="dropdown-item text-muted small">Több találat…</button>';
+      more.addEventListener('mousedown', (event) => event.preventDefault());
+      more.addEventListener('click', () => load(query, offset));
+      menu.appendChild(more);
+    }
+
+    if (!menu.children.length) {
+      menu.innerHTML = '<li><span class="dropdown-item-text text-muted">Nincs találat</span></li>';
+    }
+    menu.classList.add('show');
+  }
+
+  /**
+   * @param {string} q
+   * @param {number} from - offset of the first row
+   */
+  function load(q, from) {
+    query = q;
+    const params = new URLSearchParams({ q: q, limit: TYPEAHEAD_PAGE_SIZE, offset: from });
+    fetch(source + '?' + params.toString())
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      })
+      .then((/** @type {LookupItem[]} */ items) => {
+        if (q !== query) return; // a newer query is on its way
+        offset = from + items.length;
+        render(items, from > 0);
+      })
+      .catch((error) => console.error('Error while loading the list:', error));
+  }
+
+  input.addEventListener('input', () => {
+    hidden.value = '';
+    validate();
+    clearTimeout(timer);
+    timer = setTimeout(() => load(input.value.trim(), 0), TYPEAHEAD_DELAY_MS);
+  });
+
+  input.addEventListener('focus', () => {
+    if (!hidden.value) load(input.value.trim(), 0);
+  });
+
+  input.addEventListener('blur', close);
+
+  input.addEventListener('keydown', (event) => {
+    const items = menu.querySelectorAll('.dropdown-item');
+    if (event.key === 'Escape') {
+      close();
+    } else if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+      if (!menu.classList.contains('show') || !items.length) return;
+      event.preventDefault();
+      items[active]?.classList.remove('active');
+      active = (active + (event.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+      items[active].classList.add('active');
+      items[active].scrollIntoView({ block: 'nearest' });
+    } else if (event.key === 'Enter' && active >= 0 && items[active]) {
+      event.preventDefault();
+      items[active].click();
+    }
+  });
+
+  // a form reset doesn't restore hidden inputs
+  input.form?.addEventListener('reset', () => {
+    setTimeout(() => {
+      hidden.value = initial.id;
+      input.value = initial.text;
+      validate();
+    });
+  });
 }
@@ -0,0 +1,70 @@
+/**
+ * Navbar search box. Queries /search as the user types and lists the
+ * ranked results (cases, clients, work entries) in a dropdown. The
+ * server returns HTML escaped text with the matches wrapped in <mark>.
+ */
+document.addEventListener('DOMContentLoaded', () => {
+  const input = document.getElementById('globalSearch');
+  const menu = document.getElementById('globalSearchResults');
+  if (!input || !menu) return;
+
+  const KIND_LABELS = { case: 'Ügy', client: 'Ügyfél', work: 'Munka' };
+  let timer = null;
+  let lastQuery = '';
+
+  /**
+   * @param {{kind: string, url: string, title: ?string, detail: ?string,
+   *          snippet: ?string, case_number: ?string, date: ?string}} result
+   * @returns {string}
+   */
+  function renderResult(result) {
+    const heading = result.kind === 'work'
+      ? `${result.case_number} · ${result.date}`
+      : [result.detail, result.title].filter(Boolean).join(' - ');
+    const snippet = result.snippet ? `<div class="small text-white-50">${result.snippet}</div>` : '';
+    return `
+      <li>
+        <a class="dropdown-item text-wrap" href="${result.url}">
+          <span class="badge bg-secondary me-1">${KIND_LABELS[result.kind]}</span>${heading}
+          ${snippet}
+        </a>
+      </li>`;
+  }
+
+  function runSearch() {
+    const query = input.value.trim();
+    if (query === lastQuery) return;
+    lastQuery = query;
+
+    if (query.length < 2) {
+      menu.classList.remove('show');
+      return;
+    }
+
+    fetch('/search?' + new URLSearchParams({ q: query, limit: 15 }).toString())
+      .then((response) => response.json())
+      .then((results) => {
+        if (query !== lastQuery) return; // a newer query is on its way
+        menu.innerHTML = results.length
+          ? results.map(renderResult).join('')
+          : '<li><span class="dropdown-item-text text-white-50">Nincs találat</span></li>';
+        menu.classList.add('show');
+      })
+      .catch(() => menu.classList.remove('show'));
+  }
+
+  input.addEventListener('input', () => {
+    clearTimeout(timer);
+    timer = setTimeout(runSearch, 200);
+  });
+
+  input.addEventListener('keydown', (event) => {
+    if (event.key === 'Escape') menu.classList.remove('show');
+  });
+
+  document.addEventListener('click', (event) => {
+    if (!menu.contains(event.target) && event.target !== input) {
+      menu.classList.remove('show');
+    }
+  });
+});
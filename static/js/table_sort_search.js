@@ -6,7 +6,9 @@ document.addEventListener('DOMContentLoaded', () => {
     const headers = table.querySelectorAll('th.sortable');
     let sortDirection = {};
 
-    headers.forEach((header, index) => {
+    headers.forEach((header) => {
+      // the header's own column, tables may start with a checkbox column
+      const index = header.cellIndex;
       sortDirection[index] = 'asc';
 
       header.addEventListener('click', () => {
@@ -0,0 +1,78 @@
+import sys
+from datetime import date, time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Returns a function creating the app with the given config, on a fresh
+    SQLite database in tmp_path unless the config names a DATABASE_URL.
+    """
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    monkeypatch.delenv("LEXIUM_DATABASE_URL", raising=False)
+    monkeypatch.chdir(ROOT)
+    created = []
+
+    def make(config=None):
+        from app import create_app
+        import reference_cache
+
+        app = create_app({"TESTING": True, **(config or {})})
+        # the reference caches are per process, not per app
+        for snapshot_cache in (reference_cache.users, reference_cache.case_types,
+                               reference_cache.outsource_companies):
+            snapshot_cache.clear()
+        created.append(app)
+        return app
+
+    yield make
+
+    for app in created:
+        app.extensions["jobs"].shutdown()
+        with app.app_context():
+            from db import db
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def add_sample_data(rows, users=3):
+    """
+    Adds users, one client and case per row and a work entry for each
+    case, spread over January 2026 and the users.
+    """
+    import models as md
+    from db import db
+
+    user_rows = [md.User(username=f"user{i}", first_name="Teszt", last_name=f"Elek{i}") for i in range(users)]
+    clients = [
+        md.ClientPerson(name=f"Ügyfél {i}", address="Budapest") if i % 2
+        else md.ClientCompany(name=f"Cég {i} Kft", headquarters="Győr")
+        for i in range(rows)
+    ]
+    db.session.add_all(user_rows + clients)
+    db.session.commit()
+
+    case_type = md.CaseType.query.first()
+    for i, client in enumerate(clients):
+        case = md.Case.create(name=f"Ügy {i}", client_id=client.id, case_type_id=case_type.id,
+                              billing_type=md.BillingType.HOURLY, rate_amount=10000)
+        db.session.add(md.CaseWork(
+            user_id=user_rows[i % users].id,
+            case_id=case.id,
+            date=date(2026, 1, 1 + i % 28),
+            start_time=time(9),
+            end_time=time(10, 30),
+            description=f"Munka {i}"
+        ))
+    db.session.commit()
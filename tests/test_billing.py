@@ -0,0 +1,113 @@
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def make_case(app):
+    """
+    Returns a function adding a case with a 1.5 hour work entry on each of
+    the given days of January 2026, and returning the case's number.
+    """
+    import models as md
+    from db import db
+
+    with app.app_context():
+        user = md.User(username="teszt")
+        client = md.ClientPerson(name="Kovács Ödön", address="Budapest")
+        db.session.add_all([user, client])
+        db.session.commit()
+        user_id, client_id = user.id, client.id
+
+    def make(billing_type=md.BillingType.HOURLY, rate_amount=10000, days=range(1, 6)):
+        with app.app_context():
+            case = md.Case.create(name="Ügy", client_id=client_id, billing_type=billing_type,
+                                  rate_amount=rate_amount)
+            db.session.add_all([
+                md.CaseWork(user_id=user_id, case_id=case.id, date=date(2026, 1, day),
+                            start_time=time(9), end_time=time(10, 30))
+                for day in days
+            ])
+            db.session.commit()
+            return case.number
+
+    return make
+
+
+def bill(app, case_number, **form):
+    return app.test_client().post(f"/cases/{case_number}/bill", data=form)
+
+
+def test_invoice_amount():
+    from billing import invoice_amount
+    from models import BillingType
+
+    assert invoice_amount(BillingType.HOURLY, 10000, 5400) == Decimal("15000.00")
+    assert invoice_amount(BillingType.HOURLY, "12345.67", 1000) == Decimal("3429.35")
+    assert invoice_amount(BillingType.FIXED, 50000, 5400) == Decimal("50000.00")
+    assert invoice_amount(BillingType.FIXED, 50000, 5400, fee_charged=True) == Decimal("0.00")
+
+
+def test_hourly_case_is_billed_by_the_hours(app, make_case):
+    response = bill(app, make_case())
+
+    assert response.status_code == 201
+    invoice = response.get_json()
+    assert (invoice["work_count"], invoice["hours"], invoice["amount"]) == (5, 7.5, "75000.00")
+
+
+def test_fixed_fee_is_charged_once(app, make_case):
+    import models as md
+
+    number = make_case(billing_type=md.BillingType.FIXED, rate_amount=50000, days=[1, 2])
+
+    first = bill(app, number, date_to="2026-01-01").get_json()
+    second = bill(app, number).get_json()
+
+    assert (first["work_count"], first["amount"]) == (1, "50000.00")
+    assert (second["work_count"], second["amount"]) == (1, "0.00")
+
+
+def test_date_to_limits_the_run(app, make_case):
+    number = make_case()
+
+    invoice = bill(app, number, date_to="2026-01-02").get_json()
+    work_ids = app.test_client().get(f"/invoices/{invoice['id']}").get_json()["work_ids"]
+
+    assert (invoice["work_count"], invoice["amount"]) == (2, "30000.00")
+    assert work_ids == [1, 2]
+
+
+def test_work_ids_limit_the_run(app, make_case):
+    number = make_case()
+
+    response = app.test_client().post(f"/cases/{number}/bill", data={"work_id": ["2", "4"]})
+    invoice = response.get_json()
+    work_ids = app.test_client().get(f"/invoices/{invoice['id']}").get_json()["work_ids"]
+
+    assert invoice["work_count"] == 2
+    assert work_ids == [2, 4]
+
+
+def test_nothing_left_to_bill_is_a_conflict(app, make_case):
+    number = make_case()
+    assert bill(app, number).status_code == 201
+
+    response = bill(app, number)
+
+    assert response.status_code == 409
+    assert bill(app, "99999").status_code == 404
+
+
+def test_rollups_follow_billing(app, make_case):
+    import rollups
+    from models import CaseWorkRollup
+
+    number = make_case()
+    bill(app, number, date_to="2026-01-03")
+
+    with app.app_context():
+        assert rollups.verify_rollups() == []
+        totals = {row.billed: (row.total_seconds, row.work_count) for row in CaseWorkRollup.query}
+    assert totals == {True: (3 * 5400, 3), False: (2 * 5400, 2)}
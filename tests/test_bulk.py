@@ -0,0 +1,122 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import select
+
+
+@pytest.fixture
+def case(app):
+    """
+    One hourly case with five unbilled work entries (January 1-5) and a
+    billed one (January 6).
+    """
+    import models as md
+    from db import db
+
+    with app.app_context():
+        user = md.User(username="teszt")
+        client = md.ClientPerson(name="Kovács Ödön", address="Budapest")
+        db.session.add_all([user, client])
+        db.session.commit()
+        case = md.Case.create(name="Ügy", client_id=client.id, billing_type=md.BillingType.HOURLY,
+                              rate_amount=10000)
+        db.session.add_all([
+            md.CaseWork(user_id=user.id, case_id=case.id, date=date(2026, 1, day),
+                        start_time=time(9), end_time=time(10), billed=day == 6)
+            for day in range(1, 7)
+        ])
+        db.session.commit()
+        return case.id
+
+
+def billed_days(app):
+    import models as md
+    from db import db
+
+    with app.app_context():
+        return {
+            row.date.day: row.billed
+            for row in db.session.execute(select(md.CaseWork.date, md.CaseWork.billed))
+        }
+
+
+@pytest.mark.parametrize("billed", [True, "1"])
+def test_bulk_delete_by_billed_filter(app, case, billed):
+    response = app.test_client().post("/case-works/bulk-delete", json={"filters": {"billed": billed}})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"deleted": 1}
+    assert billed_days(app) == {1: False, 2: False, 3: False, 4: False, 5: False}
+
+
+@pytest.mark.parametrize("billed", [False, "0"])
+def test_bulk_update_by_unbilled_filter(app, case, billed):
+    import rollups
+
+    response = app.test_client().post("/case-works/bulk-update", json={
+        "filters": {"billed": billed, "date_to": "2026-01-02"},
+        "values": {"case_id": case},
+    })
+
+    assert response.status_code == 200
+    assert response.get_json() == {"updated": 2}
+    with app.app_context():
+        assert rollups.verify_rollups() == []
+
+
+@pytest.mark.parametrize("filters", [
+    {"billed": 1},
+    {"billed": "true"},
+    {"billed": "yes"},
+    {"user_id": "abc"},
+    {"user_id": True},
+    {"q": 5},
+    {"date_from": "2026-13-01"},
+])
+def test_bulk_delete_rejects_malformed_filters(app, case, filters):
+    response = app.test_client().post("/case-works/bulk-delete", json={"filters": filters})
+
+    assert response.status_code == 400
+    assert len(billed_days(app)) == 6
+
+
+def invoices(app):
+    import models as md
+
+    with app.app_context():
+        return [(invoice.work_count, str(invoice.amount)) for invoice in md.Invoice.query.order_by(md.Invoice.id)]
+
+
+def test_bulk_mark_billed_creates_an_invoice(app, case):
+    import rollups
+
+    response = app.test_client().post("/case-works/bulk-update", json={
+        "filters": {"date_to": "2026-01-03"}, "values": {"billed": True},
+    })
+
+    assert response.status_code == 200
+    assert invoices(app) == [(3, "30000.00")]
+    assert billed_days(app) == {1: True, 2: True, 3: True, 4: False, 5: False, 6: True}
+    with app.app_context():
+        assert rollups.verify_rollups() == []
+
+
+def test_bulk_mark_unbilled_recomputes_the_invoice(app, case):
+    client = app.test_client()
+    client.post("/case-works/bulk-update", json={"ids": [1, 2, 3], "values": {"billed": True}})
+
+    client.post("/case-works/bulk-update", json={"ids": [1], "values": {"billed": False}})
+    assert invoices(app) == [(2, "20000.00")]
+
+    # an invoice left without entries is dropped
+    client.post("/case-works/bulk-update", json={"ids": [2, 3], "values": {"billed": False}})
+    assert invoices(app) == []
+
+
+def test_bulk_mark_billed_only_alone(app, case):
+    response = app.test_client().post("/case-works/bulk-update", json={
+        "ids": [1], "values": {"billed": True, "case_id": case},
+    })
+
+    assert response.status_code == 400
+    assert invoices(app) == []
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+
+from conftest import add_sample_data
+
+
+@pytest.fixture
+def batch_app(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with app.app_context():
+        add_sample_data(2)
+    return app
+
+
+def export_batch(app):
+    response = app.test_client().post("/cases/export-pdf-batch")
+    assert response.status_code == 202
+    job = app.extensions["jobs"].get(response.get_json()["job_id"])
+    job.future.result()
+    return job
+
+
+def test_batch_zip_is_deleted_when_the_job_is_pruned(batch_app, monkeypatch):
+    import jobs
+
+    first = export_batch(batch_app)
+    assert os.path.exists(first.result["path"])
+
+    monkeypatch.setattr(jobs, "FINISHED_JOB_TTL", -1)
+    second = export_batch(batch_app)  # submitting prunes the first job
+
+    assert batch_app.extensions["jobs"].get(first.id) is None
+    assert not os.path.exists(first.result["path"])
+    assert os.path.exists(second.result["path"])
+
+    batch_app.extensions["jobs"].shutdown()
+    assert not os.path.exists(second.result["path"])
+
+
+def test_failing_cleanup_does_not_stop_the_others():
+    import jobs
+
+    calls = []
+    job = jobs.Job("test")
+    job.add_cleanup(lambda: 1 / 0)
+    job.add_cleanup(lambda: calls.append("done"))
+
+    job.discard()
+    job.discard()
+
+    assert calls == ["done"]
@@ -0,0 +1,78 @@
+import base64
+import json
+
+import pytest
+
+from conftest import add_sample_data
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.fixture
+def works(app):
+    with app.app_context():
+        add_sample_data(40)
+    return app
+
+
+def all_ids(sort, direction):
+    import db_utils as dbu
+
+    works, next_cursor = dbu.get_case_works_page(sort=sort, direction=direction, limit=1000)
+    assert next_cursor is None
+    return [work.id for work in works]
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("sort", ["id", "user", "case", "date", "start_time", "description", "billed"])
+def test_pages_add_up_to_the_full_ordering(works, sort, direction):
+    import db_utils as dbu
+
+    with works.app_context():
+        ids, next_cursor = [], None
+        while True:
+            page, next_cursor = dbu.get_case_works_page(sort=sort, direction=direction,
+                                                        cursor=next_cursor, limit=7)
+            ids += [work.id for work in page]
+            if next_cursor is None:
+                break
+        assert ids == all_ids(sort, direction)
+
+
+def test_page_endpoint_returns_the_next_cursor(works):
+    client = works.test_client()
+
+    first = client.get("/case-work-table/page", query_string={"sort": "date", "limit": 30}).get_json()
+    last = client.get("/case-work-table/page", query_string={
+        "sort": "date", "limit": 30, "cursor": first["next_cursor"],
+    }).get_json()
+
+    assert first["next_cursor"]
+    assert last["next_cursor"] is None
+    assert last["html"].count("<tr") == 10
+
+
+@pytest.mark.parametrize("value", [
+    "nem-kurzor",
+    "ő",
+    cursor({"id": 1}),
+    cursor([1, 2]),
+    cursor(["5"]),
+    cursor([True]),
+    cursor([1.5]),
+])
+def test_malformed_cursor_is_a_bad_request(works, value):
+    client = works.test_client()
+
+    response = client.get("/case-work-table/page", query_string={"sort": "id", "cursor": value})
+    assert response.status_code == 400
+    assert client.get("/case-work-table", query_string={"sort": "id", "cursor": value}).status_code == 400
+
+
+@pytest.mark.parametrize("value", [cursor(["2026-13-01", "09:00:00", 1]), cursor([5, "09:00:00", 1])])
+def test_malformed_date_cursor_is_a_bad_request(works, value):
+    response = works.test_client().get("/case-work-table/page", query_string={"sort": "date", "cursor": value})
+
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from conftest import add_sample_data
+
+# Most queries a page may run, however many rows it lists
+PAGE_QUERY_LIMITS = {
+    "/case-work-table": 2,
+    "/case-table": 1,
+    "/client-table": 1,
+    "/calendar?month=2026-01": 1,
+    "/user-table": 1,
+    "/reports": 4,
+}
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def page_query_count(app, path):
+    from db import db
+
+    client = app.test_client()
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as statements:
+        response = client.get(path)
+    assert response.status_code == 200, path
+    return len(statements)
+
+
+@pytest.mark.parametrize("path", sorted(PAGE_QUERY_LIMITS))
+@pytest.mark.parametrize("rows", [5, 40])
+def test_page_query_count_is_bounded(make_app, path, rows):
+    app = make_app()
+    with app.app_context():
+        add_sample_data(rows)
+
+    assert page_query_count(app, path) <= PAGE_QUERY_LIMITS[path]
@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import add_sample_data
+
+
+@pytest.fixture
+def reports(app):
+    with app.app_context():
+        add_sample_data(5)
+    return app
+
+
+def report_stats(app):
+    """
+    Loads /reports and returns the report cache's (hits, misses).
+    """
+    client = app.test_client()
+    assert client.get("/reports").status_code == 200
+    stats = client.get("/cache-stats").get_json()["reports"]
+    return stats["hits"], stats["misses"]
+
+
+def test_reports_are_served_from_the_cache(reports):
+    assert report_stats(reports) == (0, 1)
+    assert report_stats(reports) == (1, 1)
+
+
+def test_committed_work_change_invalidates(reports):
+    import models as md
+    from db import db
+
+    report_stats(reports)
+    with reports.app_context():
+        db.session.get(md.CaseWork, 1).billed = True
+        db.session.commit()
+
+    assert report_stats(reports) == (0, 2)
+
+
+def test_client_subclass_change_invalidates(reports):
+    import models as md
+    from db import db
+
+    report_stats(reports)
+    with reports.app_context():
+        db.session.get(md.ClientPerson, 2).name = "Új név"
+        db.session.commit()
+
+    assert report_stats(reports) == (0, 2)
+
+
+def test_bulk_statement_invalidates(reports):
+    report_stats(reports)
+    response = reports.test_client().post("/case-works/bulk-delete", json={"ids": [1]})
+    assert response.get_json() == {"deleted": 1}
+
+    assert report_stats(reports) == (0, 2)
+
+
+def test_rollback_and_unwatched_changes_keep_the_cache(reports):
+    import models as md
+    from db import db
+
+    report_stats(reports)
+    with reports.app_context():
+        db.session.get(md.CaseWork, 1).billed = True
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(md.CaseType(name="Új ügytípus"))
+        db.session.commit()
+
+    assert report_stats(reports) == (1, 1)
+
+
+def test_value_computed_across_a_clear_is_not_cached():
+    import cache
+
+    report_cache = cache.TTLCache("test_reports")
+
+    def compute():
+        report_cache.clear()  # a commit lands while computing
+        return "stale"
+
+    assert report_cache.get_or_set("key", compute) == "stale"
+    assert report_cache.get_or_set("key", lambda: "fresh") == "fresh"
+    assert report_cache.get("key") == "fresh"
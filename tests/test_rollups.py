@@ -0,0 +1,107 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def works(app):
+    """
+    Two users and two hourly cases. Case 1 has a 09:00-10:30 work entry of
+    each user on January 1-3.
+    """
+    import models as md
+    from db import db
+
+    with app.app_context():
+        users = [md.User(username="teszt1"), md.User(username="teszt2")]
+        client = md.ClientPerson(name="Kovács Ödön", address="Budapest")
+        db.session.add_all([*users, client])
+        db.session.commit()
+        for name in ("Ügy", "Másik ügy"):
+            md.Case.create(name=name, client_id=client.id, billing_type=md.BillingType.HOURLY,
+                           rate_amount=10000)
+        db.session.add_all([
+            md.CaseWork(user_id=user.id, case_id=1, date=date(2026, 1, day),
+                        start_time=time(9), end_time=time(10, 30))
+            for day in range(1, 4) for user in users
+        ])
+        db.session.commit()
+    return app
+
+
+def rollup_rows(app):
+    import rollups
+    from models import CaseWorkRollup
+
+    with app.app_context():
+        assert rollups.verify_rollups() == []
+        return {
+            (row.case_id, row.user_id, row.billed): (row.total_seconds, row.work_count)
+            for row in CaseWorkRollup.query
+        }
+
+
+def edit(app, work_id, **fields):
+    form = {"user_id": 1, "case_id": 1, "date": "2026-01-01", "start_time": "09:00", "end_time": "10:30"}
+    form.update(fields)
+    response = app.test_client().post(f"/edit-case-work/{work_id}", data=form)
+    assert response.status_code == 302
+
+
+def test_rollups_count_new_work(works):
+    assert rollup_rows(works) == {
+        (1, 1, False): (3 * 5400, 3),
+        (1, 2, False): (3 * 5400, 3),
+    }
+
+
+def test_edited_duration_moves_the_total(works):
+    edit(works, 1, end_time="12:00")
+
+    assert rollup_rows(works)[(1, 1, False)] == (10800 + 2 * 5400, 3)
+
+
+def test_moved_work_changes_rollup_rows(works):
+    edit(works, 1, case_id=2, user_id=2, billed="on")
+
+    assert rollup_rows(works) == {
+        (1, 1, False): (2 * 5400, 2),
+        (1, 2, False): (3 * 5400, 3),
+        (2, 2, True): (5400, 1),
+    }
+
+
+def test_work_edited_after_a_commit_leaves_its_old_row(works):
+    import models as md
+    from db import db
+
+    with works.app_context():
+        work = db.session.get(md.CaseWork, 1)
+        db.session.commit()  # expires work
+        work.case_id = 2
+        db.session.commit()
+
+    assert rollup_rows(works)[(1, 1, False)] == (2 * 5400, 2)
+
+
+def test_deleted_work_is_removed_and_empty_rows_dropped(works):
+    client = works.test_client()
+    for work_id in (1, 3, 5):  # all of user 1's work
+        assert client.post(f"/delete-case-work/{work_id}").status_code == 302
+
+    assert rollup_rows(works) == {(1, 2, False): (3 * 5400, 3)}
+
+
+def test_rebuild_repairs_the_rollups(works):
+    import rollups
+    from db import db
+
+    with works.app_context():
+        db.session.execute(text("UPDATE case_work_rollups SET total_seconds = 0"))
+        db.session.commit()
+        assert len(rollups.verify_rollups()) == 2
+
+        rollups.rebuild_rollups()
+
+    assert len(rollup_rows(works)) == 2
@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import add_sample_data
+
+
+@pytest.fixture(params=["fts", "like"])
+def cases(request, app, monkeypatch):
+    """
+    Cases 00001 to 00011 and ABC00012, searched through the FTS index or
+    the LIKE fallback.
+    """
+    import models as md
+    import search
+    from db import db
+
+    with app.app_context():
+        add_sample_data(12)
+        db.session.get(md.Case, 12).number = "ABC00012"
+        db.session.commit()
+    if request.param == "like":
+        monkeypatch.setattr(search, "has_search_index", lambda: False)
+    return app
+
+
+def case_numbers(app, q):
+    response = app.test_client().get("/get-cases", query_string={"q": q})
+    assert response.status_code == 200
+    return [case["number"] for case in response.get_json()]
+
+
+@pytest.mark.parametrize("q, numbers", [
+    # 00004 is "Ügy 3"
+    ("3", ["00003", "00004"]),
+    ("12", ["ABC00012"]),
+    ("0001", ["00001", "00010", "00011", "ABC00012"]),
+    ("abc", ["ABC00012"]),
+    ("Ügy 1", ["00002", "00011", "ABC00012"]),
+])
+def test_case_lookup_finds_numbers_by_their_digits(cases, q, numbers):
+    assert case_numbers(cases, q) == numbers
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+
+CSV = """username;case_number;date;start_time;end_time;description;billed
+teszt;00001;2026-01-01;09:00;10:30;Tárgyalás;
+teszt;00001;2026-01-02;9:00;10:00;;igen
+ismeretlen;00001;2026-01-03;09:00;10:00;;
+teszt;99999;2026-01-03;09:00;10:00;;
+teszt;00001;2026-02-30;09:00;10:00;;
+teszt;00001;2026-01-03;11:00;10:00;;
+teszt;00001;;09:00;10:00;;
+teszt;00001;2026-01-04;09:00;10:00;Tanácsadás;
+"""
+
+ERRORS = [
+    (4, "Unknown user: ismeretlen"),
+    (5, "Unknown case: 99999"),
+    (6, "Invalid date: 2026-02-30"),
+    (7, "End time must be after start time"),
+    (8, "Missing date"),
+]
+
+
+@pytest.fixture
+def case(app):
+    import models as md
+    from db import db
+
+    with app.app_context():
+        user = md.User(username="teszt")
+        client = md.ClientPerson(name="Kovács Ödön", address="Budapest")
+        db.session.add_all([user, client])
+        db.session.commit()
+        md.Case.create(name="Ügy", client_id=client.id, billing_type=md.BillingType.HOURLY,
+                       rate_amount=10000)
+        db.session.commit()
+    return app
+
+
+def test_invalid_rows_are_reported_and_valid_ones_imported(case):
+    import rollups
+    import search
+    import work_import
+    from models import CaseWork
+
+    with case.app_context():
+        rows = work_import.iter_rows(io.BytesIO(CSV.encode("utf-8")), "munkak.csv")
+        result = work_import.import_case_works(rows, chunk_size=2)
+
+        assert result == {"imported": 3, "errors": ERRORS}
+        works = CaseWork.query.order_by(CaseWork.id).all()
+        assert [(w.date.day, w.duration_seconds, w.billed) for w in works] == [
+            (1, 5400, False), (2, 3600, True), (4, 3600, False),
+        ]
+        assert rollups.verify_rollups() == []
+        assert [r["id"] for r in search.search("Tanácsadás", kind="work")] == [3]
+
+
+def test_upload_lists_the_rejected_rows(case):
+    response = case.test_client().post("/import-case-works", data={
+        "file": (io.BytesIO(CSV.encode("utf-8")), "munkak.csv"),
+    })
+
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert "3 munka sikeresen importálva." in page
+    assert "Unknown case: 99999" in page
+
+
+MISSING_COLUMNS = "username,case_number,date\nteszt,00001,2026-01-01\n"
+
+
+def test_missing_columns_are_rejected_on_upload(case):
+    response = case.test_client().post("/import-case-works", data={
+        "file": (io.BytesIO(MISSING_COLUMNS.encode("utf-8")), "munkak.csv"),
+    })
+
+    assert "Hibás fájl: Missing columns: start_time, end_time" in response.get_data(as_text=True)
+
+
+def test_missing_columns_are_rejected_on_the_command_line(case, tmp_path):
+    path = tmp_path / "munkak.csv"
+    path.write_text(MISSING_COLUMNS, encoding="utf-8")
+
+    result = case.test_cli_runner().invoke(args=["import-case-works", str(path)])
+
+    assert result.exit_code == 1
+    assert "Missing columns: start_time, end_time" in result.output
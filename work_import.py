@@ -0,0 +1,220 @@
+import csv
+import io
+import os
+from datetime import date, datetime, time
+
+import cache
+import general_utils as gu
+import reference_cache
+import rollups
+import search
+from db import db
+from models import Case, CaseWork
+
+# Rows inserted per transaction
+CHUNK_SIZE = 5000
+
+REQUIRED_COLUMNS = ("username", "case_number", "date", "start_time", "end_time")
+
+# --------------------
+# Reading
+# --------------------
+
+def iter_csv_rows(text_stream):
+    """
+    Yields (line number, row dict) from a CSV text stream without reading
+    it all into memory. The delimiter (, ; or tab) is sniffed from the
+    start of the file.
+    """
+    sample = text_stream.read(4096)
+    if sample and not sample.endswith("\n"):
+        sample += text_stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(_chain_sample(sample, text_stream), dialect=dialect)
+    check_columns(reader.fieldnames or [])
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _chain_sample(sample, text_stream):
+    # the sniffed sample is already consumed from the stream, put it back in front
+    yield from io.StringIO(sample)
+    yield from text_stream
+
+
+def iter_xlsx_rows(file):
+    """
+    Yields (row number, row dict) from the first sheet of an XLSX file in
+    openpyxl's streaming read-only mode. openpyxl is optional, it's only
+    needed for XLSX imports.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires the openpyxl package, use CSV instead.")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        check_columns(header)
+        for row_number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(file, filename):
+    """
+    Picks the reader by file extension. file is a binary file object.
+    """
+    if os.path.splitext(filename)[1].lower() == ".xlsx":
+        return iter_xlsx_rows(file)
+    return iter_csv_rows(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+
+
+def check_columns(columns):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+# --------------------
+# Validation
+# --------------------
+
+# fromisoformat is much faster than strptime, which matters at
+# hundreds of thousands of rows
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    value = str(value).strip()
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        return gu.parse_time(value)  # e.g. 9:00
+
+
+def parse_row(row, user_ids, case_ids):
+    """
+    Validates one import row and turns it into a case_work insert dict.
+    Raises ValueError with a readable message for invalid rows.
+    """
+    for column in REQUIRED_COLUMNS:
+        if row.get(column) in (None, ""):
+            raise ValueError(f"Missing {column}")
+
+    username = str(row["username"]).strip()
+    case_number = str(row["case_number"]).strip()
+    if username not in user_ids:
+        raise ValueError(f"Unknown user: {username}")
+    if case_number not in case_ids:
+        raise ValueError(f"Unknown case: {case_number}")
+
+    try:
+        work_date = _parse_date(row["date"])
+    except ValueError:
+        raise ValueError(f"Invalid date: {row['date']}")
+    try:
+        start_time = _parse_time(row["start_time"])
+        end_time = _parse_time(row["end_time"])
+    except ValueError:
+        raise ValueError(f"Invalid time: {row['start_time']} - {row['end_time']}")
+    if end_time <= start_time:
+        raise ValueError("End time must be after start time")
+
+    description = row.get("description")
+    description = str(description).strip() if description not in (None, "") else None
+    if description and len(description) > 255:
+        raise ValueError("Description is longer than 255 characters")
+
+    billed = str(row.get("billed") or "").strip().lower() in ("1", "true", "igen", "yes", "x")
+
+    return {
+        "user_id": user_ids[username],
+        "case_id": case_ids[case_number],
+        "date": work_date,
+        "start_time": start_time,
+        "end_time": end_time,
+        "description": description,
+        "billed": billed,
+        # the ORM events don't run for bulk inserts, compute it here
+        "duration_seconds": CaseWork.calculate_duration_seconds(work_date, start_time, end_time),
+    }
+
+# --------------------
+# Loading
+# --------------------
+
+def insert_batch(batch):
+    """
+    Inserts one batch with a single executemany and updates the report
+    rollups and the search index, in one transaction.
+    """
+    deltas = {}
+    for work in batch:
+        key = (work["case_id"], work["user_id"], work["billed"])
+        seconds, count = deltas.get(key, (0, 0))
+        deltas[key] = (seconds + work["duration_seconds"], count + 1)
+
+    try:
+        connection = db.session.connection()
+        with search.bulk_work_insert(connection):
+            # Core insert: one executemany, without the ORM's per-row bookkeeping
+            db.session.execute(CaseWork.__table__.insert(), batch)
+        cache.mark_changed(db.session, CaseWork)
+        for (case_id, user_id, billed), (seconds, count) in deltas.items():
+            rollups.apply_delta(connection, case_id, user_id, billed, seconds, count)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def import_case_works(rows, chunk_size=CHUNK_SIZE):
+    """
+    Imports (row number, row dict) pairs as case work entries. Users and
+    cases are resolved by username and case number from lookup dicts
+    loaded once. Invalid rows are skipped and reported, valid ones are
+    inserted chunk_size at a time.
+
+    Returns {"imported": count, "errors": [(row number, message), ...]}.
+    """
+    user_ids = reference_cache.users.snapshot().by_name
+    case_ids = dict(db.session.query(Case.number, Case.id))
+
+    imported = 0
+    errors = []
+    batch = []
+
+    for row_number, row in rows:
+        try:
+            batch.append(parse_row(row, user_ids, case_ids))
+        except ValueError as e:
+            errors.append((row_number, str(e)))
+            continue
+
+        if len(batch) >= chunk_size:
+            insert_batch(batch)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        insert_batch(batch)
+        imported += len(batch)
+
+    return {"imported": imported, "errors": errors}